@@ -0,0 +1,18 @@
+"""
+即时编译支持模块：安装了numba时以njit编译数值内核，否则原样以Python执行
+"""
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """
+        numba.njit的替身，直接返回原函数
+
+        兼容@njit与@njit(cache=True, ...)两种写法
+        """
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
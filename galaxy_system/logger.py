@@ -2,9 +2,60 @@
 日志配置模块，提供统一的日志配置
 """
 import os
+import atexit
 import logging
 from datetime import datetime
 
+LOG_BUFFER_SIZE = 65536  # 日志文件写缓冲大小（字节）
+
+class BufferedFileHandler(logging.StreamHandler):
+    """
+    带写缓冲的文件日志处理器：记录先写入缓冲区，攒满后才落盘，
+    避免FileHandler每条记录一次write系统调用；ERROR及以上的记录立即落盘，进程异常退出时不丢失
+    """
+    
+    def __init__(self, filename, buffer_size=LOG_BUFFER_SIZE, encoding='utf-8'):
+        """
+        初始化缓冲文件处理器
+        
+        参数:
+            filename: 日志文件路径
+            buffer_size: 写缓冲大小（字节）
+            encoding: 文件编码
+        """
+        super().__init__(open(filename, 'a', buffering=buffer_size, encoding=encoding))
+    
+    def emit(self, record):
+        """写入一条记录，ERROR以下不逐条flush"""
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def close(self):
+        """刷新缓冲并关闭文件"""
+        self.acquire()
+        try:
+            try:
+                self.flush()
+            finally:
+                stream = self.stream
+                self.stream = None
+                if stream is not None and hasattr(stream, "close"):
+                    stream.close()
+                super().close()
+        finally:
+            self.release()
+    
+    def flush(self):
+        """将缓冲区内容写入文件"""
+        if self.stream is not None:
+            super().flush()
+
 def setup_logging(log_dir="logs", level=logging.INFO):
     """
     配置日志系统
@@ -12,18 +63,28 @@ def setup_logging(log_dir="logs", level=logging.INFO):
     参数:
         log_dir: 日志目录
         level: 日志级别
+    
+    返回:
+        str: 日志文件路径；根日志器已有处理器时basicConfig不生效，不创建日志文件，返回None
     """
+    if logging.getLogger().handlers:
+        # 文件处理器只在确实会被安装时创建，否则打开的文件无人关闭
+        return None
+    
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_file = os.path.join(log_dir, f"stardust-lament-engine_{timestamp}.log")
     
+    file_handler = BufferedFileHandler(log_file)
+    atexit.register(file_handler.flush)
+    
     logging.basicConfig(
         level=level,
         format='%(asctime)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
+            file_handler,
             logging.StreamHandler()
         ]
     )
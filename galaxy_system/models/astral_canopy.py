@@ -1,16 +1,152 @@
 import math
-from typing import List
+import logging
+from typing import Dict, List
+import numpy as np
 from .stellar_pearl import StellarPearl
 from .celestial_plume import CelestialPlume
 from ..modules.gravity_loom import GravityLoom
-from ..modules.boundary.base import BoundaryAtrium
-from ..modules.boundary.infinite import MirrorAbyssGate
-from ..modules.boundary.reflective import PrismicEchoWall
+from ..modules.boundary.base import BoundaryAtrium, BOUNDARY_REGISTRY
+
+logger = logging.getLogger(__name__)
+
+class StellarPearlSoA:
+    """星核群落的结构数组：以连续内存记录众星核的坐标、质量与共鸣状态，供星引织网直接读写"""
+    INITIAL_CAPACITY = 8
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY, dtype=np.float64):
+        """
+        初始化星核结构数组
+        
+        Args:
+            capacity: 初始容量，容量不足时按倍数扩张
+            dtype: 坐标与质量的存储精度，np.float32可减半每步读取的内存量
+        """
+        self._capacity = max(1, capacity)
+        self._size = 0
+        self._positions = np.zeros((self._capacity, 3), dtype=dtype)
+        self._masses = np.zeros(self._capacity, dtype=dtype)
+        self._valid_mask = np.zeros(self._capacity, dtype=bool)
+        self._perturbations_mask = np.zeros(self._capacity, dtype=bool)
+        self._revival_rounds = np.full(self._capacity, -1, dtype=np.int64)
+        self._sleep_timers = np.full(self._capacity, -1, dtype=np.int32)
+        self._names: List[str] = []
+        self.name_index: Dict[str, int] = {}
+        self._name_counts: Dict[str, int] = {}
+
+    positions = property(lambda self: self._positions[:self._size], doc="获取星核坐标数组 (N, 3)")
+    masses = property(lambda self: self._masses[:self._size], doc="获取星核质量数组 (N,)")
+    valid_mask = property(lambda self: self._valid_mask[:self._size], doc="获取星核有效掩码 (N,)")
+    perturbations_mask = property(lambda self: self._perturbations_mask[:self._size], doc="获取星核引力扰动掩码 (N,)")
+    revival_rounds = property(lambda self: self._revival_rounds[:self._size], doc="获取星核失效时的步数 (N,)，-1表示从未失效")
+    sleep_timers = property(lambda self: self._sleep_timers[:self._size], doc="获取星核沉眠计时器 (N,)，剩余步数，-1表示未沉眠")
+    names = property(lambda self: self._names, doc="获取星核名称列表")
+    dtype = property(lambda self: self._positions.dtype, doc="获取坐标与质量的存储精度")
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, capacity: int):
+        """
+        扩张容量，保留已有数据
+        
+        Args:
+            capacity: 新容量
+        """
+        size = self._size
+        for attr in ("_positions", "_masses", "_valid_mask", "_perturbations_mask", "_revival_rounds", "_sleep_timers"):
+            old = getattr(self, attr)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:size] = old[:size]
+            setattr(self, attr, new)
+        self._capacity = capacity
+
+    def append(self, name: str, position, mass: float, is_valid: bool, perturbations: bool,
+               revival_rounds: int = -1) -> int:
+        """
+        追加一颗星核
+        
+        Args:
+            name: 星核名称
+            position: 坐标 (x, y, z)
+            mass: 质量
+            is_valid: 是否有效
+            perturbations: 是否产生引力扰动
+            revival_rounds: 星核失效时的步数
+            
+        Returns:
+            int: 星核所在行号
+        """
+        if self._size == self._capacity:
+            self._reserve(self._capacity * 2)
+        idx = self._size
+        self._positions[idx] = position
+        self._masses[idx] = mass
+        self._valid_mask[idx] = is_valid
+        self._perturbations_mask[idx] = perturbations
+        self._revival_rounds[idx] = revival_rounds
+        self._sleep_timers[idx] = -1
+        self._names.append(name)
+        self.name_index.setdefault(name, idx)
+        self._name_counts[name] = self._name_counts.get(name, 0) + 1
+        self._size += 1
+        return idx
+
+    def remove(self, idx: int) -> int:
+        """
+        移除指定行的星核：末行搬入空位后弹出末行，O(1)
+        
+        Args:
+            idx: 星核所在行号
+            
+        Returns:
+            int: 被搬入idx的原末行行号，若移除的就是末行则返回idx
+        """
+        last = self._size - 1
+        name = self._names[idx]
+        if idx != last:
+            for arr in (self._positions, self._masses, self._valid_mask, self._perturbations_mask,
+                        self._revival_rounds, self._sleep_timers):
+                arr[idx] = arr[last]
+            moved_name = self._names[last]
+            self._names[idx] = moved_name
+            if self.name_index.get(moved_name) == last:
+                self.name_index[moved_name] = idx
+        self._names.pop()
+        self._size = last
+
+        count = self._name_counts[name] - 1
+        if count:
+            self._name_counts[name] = count
+            if self.name_index.get(name) == idx and self._names[idx] != name:
+                # 仅在存在同名星核时才回退到线性查找
+                self.name_index[name] = self._names.index(name)
+        else:
+            del self._name_counts[name]
+            del self.name_index[name]
+        return last
+
+    def snapshot(self) -> dict:
+        """
+        整体导出星核快照，每个字段一次tolist转换
+        
+        Returns:
+            dict: 包含names、positions、masses、valid、perturbations的字典
+        """
+        size = self._size
+        return {
+            "names": list(self._names),
+            "positions": self._positions[:size].tolist(),
+            "masses": self._masses[:size].tolist(),
+            "valid": self._valid_mask[:size].tolist(),
+            "perturbations": self._perturbations_mask[:size].tolist()
+        }
+
 
 class AstralCanopy:
     """星穹领域：封闭的宇宙庭园，根据星律、领域核心（无引力）计算奥尔特云边界半径，根据界域特性生成星穹边际，以记录万物位置"""
     
-    def __init__(self, gravity_loom: GravityLoom, central_mass: float = 88500, boundary_type: str = "infinite", reflection_angle: float = 0, reflection_angle_range: float = math.pi/3):
+    def __init__(self, gravity_loom: GravityLoom, central_mass: float = 88500, boundary_type: str = "infinite", reflection_angle: float = 0, reflection_angle_range: float = math.pi/3,
+                 dtype=np.float64):
         """
         初始化星穹领域
         
@@ -18,44 +154,33 @@ class AstralCanopy:
             gravity_loom: 星引织网
             central_mass: 领域核心质量(必须>0)
             boundary_type: 界域类型("infinite"或"reflective")
+            dtype: 星核结构数组的存储精度
         
         Raises:
             ValueError: 如果central_mass<=0或boundary_type无效
         """
-        import logging
-        
         # 验证中央质量
         if central_mass <= 0:
             raise ValueError(f"Central mass must be positive, got {central_mass}")
             
         self.central_mass = central_mass
-        logging.debug(f"计算奥尔特云半径，中央质量={central_mass}")
-        
-        try:
-            self._oort_cloud_radius = gravity_loom.calculate_oort_cloud_radius(central_mass)
-            logging.debug(f"奥尔特云半径计算结果: {self._oort_cloud_radius}")
-        except Exception as e:
-            logging.error(f"计算奥尔特云半径失败: {str(e)}")
-            raise
+        logger.debug("计算奥尔特云半径，中央质量=%s", central_mass)
+        
+        self._oort_cloud_radius = gravity_loom.calculate_oort_cloud_radius(central_mass)
+        logger.debug("奥尔特云半径计算结果: %s", self._oort_cloud_radius)
             
         self._celestial_plume = None
         self.boundary_type = boundary_type.lower()
         
         # 创建界域回廊
-        try:
-            logging.debug(f"创建边界条件，类型={boundary_type}")
-            if self.boundary_type == "infinite":
-                self.boundary_effect = MirrorAbyssGate(self._oort_cloud_radius)
-            elif self.boundary_type == "reflective":
-                self.boundary_effect = PrismicEchoWall(self._oort_cloud_radius)
-            else:
-                raise ValueError(f"未知边界类型: {boundary_type}")
-                
-            logging.debug("边界条件创建成功")
-        except Exception as e:
-            logging.error(f"创建边界条件失败: {str(e)}")
-            raise
+        logger.debug("创建边界条件，类型=%s", boundary_type)
+        boundary_cls = BOUNDARY_REGISTRY.get(self.boundary_type)
+        if boundary_cls is None:
+            raise ValueError(f"未知边界类型: {boundary_type}")
+        self.boundary_effect = boundary_cls(self._oort_cloud_radius)
+        logger.debug("边界条件创建成功")
         self.stellar_pearls: List[StellarPearl] = []
+        self.pearl_soa = StellarPearlSoA(dtype=dtype)
         self.gravity_module: GravityLoom = None
         self.simulation_module = None
     
@@ -93,6 +218,16 @@ class AstralCanopy:
         Args:
             stellar_pearl: 星核对象
         """
+        position = stellar_pearl.position
+        idx = self.pearl_soa.append(
+            stellar_pearl.name,
+            (position.x, position.y, position.z),
+            stellar_pearl.mass,
+            stellar_pearl.is_valid,
+            stellar_pearl.perturbations,
+            stellar_pearl.revival_rounds
+        )
+        stellar_pearl.bind(self.pearl_soa, idx)
         self.stellar_pearls.append(stellar_pearl)
     
     def remove_stellar_pearl(self, stellar_pearl: StellarPearl):
@@ -102,8 +237,16 @@ class AstralCanopy:
         Args:
             stellar_pearl: 星核对象
         """
-        if stellar_pearl in self.stellar_pearls:
-            self.stellar_pearls.remove(stellar_pearl)
+        if stellar_pearl.soa is not self.pearl_soa:
+            return
+        idx = stellar_pearl.soa_index
+        stellar_pearl.unbind()
+        self.pearl_soa.remove(idx)
+        # 与结构数组保持一致：末位星核搬入空位
+        last = self.stellar_pearls.pop()
+        if last is not stellar_pearl:
+            self.stellar_pearls[idx] = last
+            last.bind(self.pearl_soa, idx)
 
     def remove_celestial_plume(self):
         """
@@ -133,10 +276,19 @@ class AstralCanopy:
         Returns:
             StellarPearl: 星核对象，如果找不到则返回None
         """
-        for stellar_pearl in self.stellar_pearls:
-            if stellar_pearl.name == name:
-                return stellar_pearl
-        return None
+        idx = self.pearl_soa.name_index.get(name)
+        if idx is None:
+            return None
+        return self.stellar_pearls[idx]
+    
+    def snapshot(self) -> dict:
+        """
+        导出全部星核的快照，供日志、回放等序列化使用
+        
+        Returns:
+            dict: 星核结构数组快照，见StellarPearlSoA.snapshot
+        """
+        return self.pearl_soa.snapshot()
     
     def set_gravity_module(self, gravity_module: GravityLoom):
         """
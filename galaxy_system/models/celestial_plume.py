@@ -1,9 +1,14 @@
 import logging
+from typing import Optional, Tuple
+import numpy as np
 from ..models.vector3d import Vector3D
 from ..models.stardust_core import StardustCore
 
+logger = logging.getLogger(__name__)
+
 class CelestialPlume(StardustCore):
-    """星翎"""
+    """星翎：坐标与速度以连续数组承载，供边界与引力计算直接读写"""
+    __slots__ = ('_position_array', '_velocity_array', '_acceleration_cache')
     DEFAULT_MASS = 1.0
     
     def __init__(self, position: Vector3D, velocity: Vector3D, mass: float):
@@ -15,36 +20,64 @@ class CelestialPlume(StardustCore):
             velocity: 三维速度矢量 (vx, vy, vz)
             mass: 质量
         """
-        super().__init__(mass, position, 1.0, 1.0, 1.0)
         if mass <= 0:
             mass = CelestialPlume.DEFAULT_MASS
-            logging.warning("质量必须为正数，已重置为默认值 1.0")
+            logger.warning("质量必须为正数，已重置为默认值 1.0")
+        # 星翎没有轨道参数，坐标与速度由下方数组承载
+        super().__init__(mass, position, 0.0, 0.0, 0.0)
         
-        self._position = position
-        self._velocity = velocity
+        self._position_array = np.array([position.x, position.y, position.z], dtype=np.float64)
+        self._velocity_array = np.array([velocity.x, velocity.y, velocity.z], dtype=np.float64)
+        # 速度Verlet积分缓存：(坐标, 该坐标处的加速度)，坐标不变时下一步直接复用
+        self._acceleration_cache = None
     
     @property
     def position(self) -> Vector3D:
         """获取星翎位置"""
-        return self._position
+        return Vector3D.from_array(self._position_array)
     
     @position.setter
     def position(self, value: Vector3D) -> None:
         """设置星翎位置"""
-        self._position = value
+        self._position_array[:] = (value.x, value.y, value.z)
     
     @property
     def velocity(self) -> Vector3D:
         """获取星翎速度"""
-        return self._velocity
+        return Vector3D.from_array(self._velocity_array)
     
     @velocity.setter
     def velocity(self, value: Vector3D) -> None:
         """设置星翎速度"""
-        self._velocity = value
+        self._velocity_array[:] = (value.x, value.y, value.z)
+    
+    position_array = property(lambda self: self._position_array, doc="获取星翎坐标数组 (3,)，可原地修改")
+    velocity_array = property(lambda self: self._velocity_array, doc="获取星翎速度数组 (3,)，可原地修改")
+    
+    def cached_acceleration(self) -> Optional[Tuple[float, float, float]]:
+        """
+        获取上一步积分留下的加速度，星翎坐标已被改动时视为失效
+        
+        Returns:
+            Optional[Tuple[float, float, float]]: 当前坐标处的加速度，无有效缓存时为None
+        """
+        cache = self._acceleration_cache
+        if cache is None or cache[0] != tuple(self._position_array.tolist()):
+            return None
+        return cache[1]
+    
+    def cache_acceleration(self, position: Tuple[float, float, float], acceleration: Tuple[float, float, float]) -> None:
+        """
+        记录某坐标处的加速度，供下一步速度Verlet积分复用
+        
+        Args:
+            position: 坐标 (x, y, z)
+            acceleration: 该坐标处的加速度 (ax, ay, az)
+        """
+        self._acceleration_cache = (position, acceleration)
     
     def __str__(self) -> str:
-        return f"CelestialPlume(position={self._position}, velocity={self._velocity}, mass={self.mass})"
+        return f"CelestialPlume(position={self.position}, velocity={self.velocity}, mass={self.mass})"
     
     def __repr__(self) -> str:
         return self.__str__()
@@ -57,7 +90,7 @@ class CelestialPlume(StardustCore):
             dict: 星翎属性字典
         """
         return {
-            "position": (self._position.x, self._position.y, self._position.z),
-            "velocity": (self._velocity.x, self._velocity.y, self._velocity.z),
+            "position": tuple(self._position_array.tolist()),
+            "velocity": tuple(self._velocity_array.tolist()),
             "mass": self.mass
         }
\ No newline at end of file
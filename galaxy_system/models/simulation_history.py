@@ -0,0 +1,63 @@
+from typing import List, Tuple
+import numpy as np
+
+class SimulationHistory:
+    """星轨卷轴：以预分配数组记录星翎每步的坐标与速度，捕获与边界碰撞另以紧凑事件列表记录"""
+    __slots__ = ('_positions', '_velocities', '_captures', '_collisions', '_length')
+
+    def __init__(self, steps: int):
+        """
+        初始化星轨卷轴
+
+        Args:
+            steps: 预计记录的步数
+        """
+        self._positions = np.empty((steps, 3), dtype=np.float64)
+        self._velocities = np.empty((steps, 3), dtype=np.float64)
+        self._captures: List[Tuple[int, int]] = []
+        self._collisions: List[Tuple[int, np.ndarray, np.ndarray]] = []
+        self._length = 0
+
+    positions = property(lambda self: self._positions[:self._length], doc="获取已记录的星翎坐标数组 (S, 3)")
+    velocities = property(lambda self: self._velocities[:self._length], doc="获取已记录的星翎速度数组 (S, 3)")
+    captures = property(lambda self: self._captures, doc="获取捕获事件列表 [(步数, 星核id)]")
+    collisions = property(lambda self: self._collisions, doc="获取边界碰撞事件列表 [(步数, 碰撞后坐标, 碰撞后速度)]")
+
+    def record(self, position: np.ndarray, velocity: np.ndarray) -> None:
+        """
+        记录一步结束时星翎的坐标与速度
+
+        Args:
+            position: 星翎坐标数组 (3,)
+            velocity: 星翎速度数组 (3,)
+        """
+        self._positions[self._length] = position
+        self._velocities[self._length] = velocity
+        self._length += 1
+
+    def record_capture(self, step: int, stellar_pearl_id: int) -> None:
+        """
+        记录捕获事件
+
+        Args:
+            step: 步数
+            stellar_pearl_id: 星核id
+        """
+        self._captures.append((step, stellar_pearl_id))
+
+    def record_collision(self, step: int, position: np.ndarray, velocity: np.ndarray) -> None:
+        """
+        记录边界碰撞事件
+
+        Args:
+            step: 步数
+            position: 碰撞处理后的坐标数组 (3,)
+            velocity: 碰撞处理后的速度数组 (3,)
+        """
+        self._collisions.append((step, np.array(position, dtype=np.float64), np.array(velocity, dtype=np.float64)))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __str__(self) -> str:
+        return f"SimulationHistory(steps={self._length}, captures={len(self._captures)}, collisions={len(self._collisions)})"
\ No newline at end of file
@@ -2,6 +2,7 @@ from ..models.vector3d import Vector3D
 
 class StardustCore:
     """星尘之核"""
+    __slots__ = ('_mass', '_position', '_orbital_radius', '_orbital_velocity', '_escape_velocity')
     
     def __init__(self, mass: float, position: Vector3D, orbital_radius: float, orbital_velocity: float, escape_velocity: float):
         """
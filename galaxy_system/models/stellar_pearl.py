@@ -2,8 +2,11 @@ import logging
 from ..models.vector3d import Vector3D
 from ..models.stardust_core import StardustCore
 
+logger = logging.getLogger(__name__)
+
 class StellarPearl(StardustCore):
-    """星核类：没有体积，只有引力的珍珠"""
+    """星核类：没有体积，只有引力的珍珠；加入星穹领域后，坐标、质量与共鸣状态由星核结构数组承载"""
+    __slots__ = ('_name', '_perturbations', '_is_valid', '_revival_rounds', '_soa', '_idx')
     DEFAULT_ANCHOR_MASS = 50
     DEFAULT_ORBITAL_VELOCITY=1.0
     
@@ -25,28 +28,58 @@ class StellarPearl(StardustCore):
 
         self._is_valid = True # 是否有效的锚点
         if mass <= 0:
-            logging.info(f"星核({name})的质量必须为正值")
+            logger.info("星核(%s)的质量必须为正值", name)
             self._is_valid = False
 
         if orbit_velocity <= 0:
-            logging.info(f"星核({name})的轨道速度必须为正值")
+            logger.info("星核(%s)的轨道速度必须为正值", name)
             self._is_valid = False
 
         self._name = name
         self._position = position
         self._perturbations = perturbations
-        self.revival_rounds = -1
+        self._revival_rounds = -1
+        self._soa = None # 所属星核结构数组
+        self._idx = -1   # 在结构数组中的行号
 
     def __str__(self) -> str:
-        return f"StellarPearl(name={self._name}, mass={self._mass}, position={self._position}, orbit_velocity={self._orbit_velocity}, orbit_altitude={self._orbit_altitude}, escape_velocity={self._escape_velocity}, perturbations={self._perturbations}, is_valid={self._is_valid})"
+        return f"StellarPearl(name={self._name}, mass={self.mass}, position={self.position}, orbit_velocity={self.orbit_velocity}, orbit_radius={self.orbit_radius}, escape_velocity={self.escape_velocity}, perturbations={self.perturbations}, is_valid={self.is_valid})"
     
     def __repr__(self) -> str:
-        return self.__str__()
+        return f"StellarPearl(name={self._name}, position={self.position})"
     
+    def bind(self, soa, idx: int) -> None:
+        """
+        绑定到星核结构数组
+        
+        Args:
+            soa: 星核结构数组
+            idx: 所在行号
+        """
+        self._soa = soa
+        self._idx = idx
+
+    soa = property(lambda self: self._soa, doc="获取所属星核结构数组，未加入星穹领域时为None")
+    soa_index = property(lambda self: self._idx, doc="获取在星核结构数组中的行号")
+
+    def unbind(self) -> None:
+        """从星核结构数组解绑，并将当前状态写回自身"""
+        if self._soa is None:
+            return
+        self._position = self.position
+        self._mass = self.mass
+        self._is_valid = self.is_valid
+        self._perturbations = self.perturbations
+        self._revival_rounds = self.revival_rounds
+        self._soa = None
+        self._idx = -1
+
     @property
     def is_valid(self) -> bool:
         """获取星核是否有效"""
-        return self._is_valid
+        if self._soa is None:
+            return self._is_valid
+        return bool(self._soa.valid_mask[self._idx])
     
     @property
     def name(self) -> str:
@@ -56,17 +89,46 @@ class StellarPearl(StardustCore):
     @property
     def position(self) -> Vector3D:
         """获取星核位置"""
-        return self._position
+        if self._soa is None:
+            return self._position
+        return Vector3D.from_array(self._soa.positions[self._idx])
+    
+    @property
+    def mass(self) -> float:
+        """获取星核质量"""
+        if self._soa is None:
+            return self._mass
+        return float(self._soa.masses[self._idx])
     
     @property
     def perturbations(self) -> bool:
         """获取是否产生引力扰动"""
-        return self._perturbations
+        if self._soa is None:
+            return self._perturbations
+        return bool(self._soa.perturbations_mask[self._idx])
     
     @perturbations.setter
     def perturbations(self, value: bool) -> None:
         """设置是否产生引力扰动"""
-        self._perturbations = value
+        if self._soa is None:
+            self._perturbations = value
+        else:
+            self._soa.perturbations_mask[self._idx] = value
+
+    @property
+    def revival_rounds(self) -> int:
+        """获取星核失效时的步数，-1表示从未失效"""
+        if self._soa is None:
+            return self._revival_rounds
+        return int(self._soa.revival_rounds[self._idx])
+    
+    @revival_rounds.setter
+    def revival_rounds(self, value: int) -> None:
+        """设置星核失效时的步数"""
+        if self._soa is None:
+            self._revival_rounds = value
+        else:
+            self._soa.revival_rounds[self._idx] = value
 
     def to_dict(self) -> dict:
         """
@@ -75,13 +137,17 @@ class StellarPearl(StardustCore):
         Returns:
             dict: 星核属性字典
         """
+        if self._soa is not None:
+            position = tuple(self._soa.positions[self._idx].tolist())
+        else:
+            position = (self._position.x, self._position.y, self._position.z)
         return {
             "name": self._name,
-            "position": (self._position.x, self._position.y, self._position.z),
+            "position": position,
             "mass": self.mass,
             "orbit_radius": self.orbit_radius,
             "orbit_velocity": self.orbit_velocity,
             "escape_velocity": self.escape_velocity,
-            "perturbations": self._perturbations,
-            "is_valid": self._is_valid
+            "perturbations": self.perturbations,
+            "is_valid": self.is_valid
         }
\ No newline at end of file
@@ -1,71 +1,100 @@
 from __future__ import annotations
-import torch
+import math
+import numpy as np
 
 
 class Vector3D:
-    """三维向量类，用于表示和操作三维空间中的向量"""
+    """
+    三维向量类，用于表示和操作三维空间中的向量
     
-    def __init__(self, x, y, z):
-        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self._data = torch.tensor([x, y, z], dtype=torch.float64, device=device)
-    
-    @property
-    def x(self):
-        """获取x分量"""
-        return self._data[0].item()
+    向量是不可变的：所有运算都返回新向量，从不修改操作数，
+    因此 Vector3D.ORIGIN 这样的共享实例可以安全复用，
+    向量也可按分量比较相等并作为字典键或集合元素。
+    """
+    __slots__ = ('x', 'y', 'z')
     
-    @property
-    def y(self):
-        """获取y分量"""
-        return self._data[1].item()
-    
-    @property
-    def z(self):
-        """获取z分量"""
-        return self._data[2].item()
+    def __init__(self, x, y, z):
+        # 分量直接以Python浮点数存放，读取时无需数组索引与标量装箱
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
 
     def __add__(self, other: Vector3D):
         """向量加法"""
-        result = self._data + other._data
-        return Vector3D(*result.tolist())
+        return Vector3D(self.x + other.x, self.y + other.y, self.z + other.z)
 
     def __sub__(self, other: Vector3D):
         """向量减法"""
-        result = self._data - other._data
-        return Vector3D(*result.tolist())
+        return Vector3D(self.x - other.x, self.y - other.y, self.z - other.z)
 
     def __mul__(self, scalar):
         """向量与标量乘法"""
-        result = self._data * scalar
-        return Vector3D(*result.tolist())
+        return Vector3D(self.x * scalar, self.y * scalar, self.z * scalar)
 
     def __truediv__(self, scalar):
         """向量与标量除法"""
         if scalar == 0:
             raise ValueError("Cannot divide by zero")
-        result = self._data / scalar
-        return Vector3D(*result.tolist())
+        return Vector3D(self.x / scalar, self.y / scalar, self.z / scalar)
 
     def magnitude(self):
         """计算向量的模长。"""
-        return torch.norm(self._data).item()
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
 
     def normalize(self):
         """返回向量的单位向量。"""
         mag = self.magnitude()
         if mag == 0:
-            return Vector3D(0, 0, 0)  # 避免除以零
-        result = self._data / mag
-        return Vector3D(*result.tolist())
+            return Vector3D.ORIGIN  # 避免除以零
+        inv = 1.0 / mag
+        return Vector3D(self.x * inv, self.y * inv, self.z * inv)
 
     def cross(self, other: Vector3D):
         """计算两个向量的叉积（外积）。"""
-        result = torch.linalg.cross(self._data, other._data)
-        return Vector3D(*result.tolist())
+        return Vector3D(
+            self.y * other.z - self.z * other.y,
+            self.z * other.x - self.x * other.z,
+            self.x * other.y - self.y * other.x
+        )
     
     def dot(self, other: Vector3D):
         """计算两个向量的点积（内积）。"""
-        return torch.dot(self._data, other._data).item()
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def __eq__(self, other):
+        """按分量比较相等"""
+        if not isinstance(other, Vector3D):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y and self.z == other.z
+
+    def __hash__(self):
+        """按分量求哈希，与__eq__一致"""
+        return hash((self.x, self.y, self.z))
+
+    def to_array(self) -> np.ndarray:
+        """
+        转换为坐标数组，供数组化的内部计算使用
+
+        Returns:
+            np.ndarray: 形状为 (3,) 的float64数组
+        """
+        return np.array((self.x, self.y, self.z), dtype=np.float64)
+
+    @classmethod
+    def from_array(cls, arr: np.ndarray) -> Vector3D:
+        """
+        由坐标数组构造向量：一次tolist取出三个分量，避免逐个装箱数组标量
+
+        向量不可变，因此返回的是数组当前值的副本而非随数组变化的视图
+
+        Args:
+            arr: 形状为 (3,) 的数组
+
+        Returns:
+            Vector3D: 对应的向量
+        """
+        x, y, z = arr.tolist()
+        return cls(x, y, z)
 
     def __str__(self):
         """字符串表示，保留5位小数"""
@@ -73,4 +102,7 @@ class Vector3D:
 
     def __repr__(self):
         """对象表示"""
-        return f"Vector3D({self.x}, {self.y}, {self.z})"
\ No newline at end of file
+        return f"Vector3D({self.x}, {self.y}, {self.z})"
+
+
+Vector3D.ORIGIN = Vector3D(0, 0, 0)  # 原点（零向量）单例
\ No newline at end of file
@@ -0,0 +1,435 @@
+"""
+星引织网的数值内核：以标量浮点与连续数组计算引力加速度与单步积分，不构造任何向量对象
+"""
+from math import sqrt
+import numpy as np
+from .._jit import njit, NUMBA_AVAILABLE
+
+# integrate_batch的积分方法编号
+EULER = 0
+RK2 = 1
+RK4 = 2
+VERLET = 3
+
+# 未安装numba时，引力源达到该数才以数组运算求引力源间的相互加速度
+PAIRS_MIN_SOURCES = 8
+
+
+@njit(cache=True, fastmath=True)
+def mutual_acceleration_sum(src_pos, src_mass, G, min_dist, c, relativistic):
+    """
+    各引力源受其余引力源的引力加速度之和 Σ_i a_i，质量不超过1e-10的引力源不作为受力方
+
+    按牛顿第三定律每个无序对(i, j)只求一次距离：i受j与j受i的加速度方向相反，
+    合为 (f_ij - f_ji)·(r_j - r_i)，距离与开方次数减半
+
+    Args:
+        src_pos: 引力源坐标数组 (N, 3)
+        src_mass: 引力源质量数组 (N,)
+        G: 引力常数
+        min_dist: 引力作用最小距离
+        c: 光速常量
+        relativistic: 是否启用相对论修正
+
+    Returns:
+        Tuple[float, float, float]: 加速度之和 (sx, sy, sz)
+    """
+    n = src_pos.shape[0]
+    min_dist2 = min_dist * min_dist
+    inv_c2 = 1.0 / (c * c)
+    sx = 0.0
+    sy = 0.0
+    sz = 0.0
+    for i in range(n - 1):
+        mi = src_mass[i]
+        xi = src_pos[i, 0]
+        yi = src_pos[i, 1]
+        zi = src_pos[i, 2]
+        for j in range(i + 1, n):
+            mj = src_mass[j]
+            i_feels = mi > 1e-10
+            j_feels = mj > 1e-10
+            if not (i_feels or j_feels):
+                continue
+            dx = src_pos[j, 0] - xi
+            dy = src_pos[j, 1] - yi
+            dz = src_pos[j, 2] - zi
+            d2 = dx * dx + dy * dy + dz * dz
+            if d2 < min_dist2:
+                continue
+            inv_r = 1.0 / sqrt(d2)
+            inv_r3 = G * inv_r * inv_r * inv_r
+            f = 0.0
+            if i_feels:  # i受j吸引，沿 r_j - r_i
+                f_ij = mj * inv_r3
+                if relativistic:
+                    f_ij *= 1.0 + 3.0 * G * mj * inv_r * inv_c2
+                f += f_ij
+            if j_feels:  # j受i吸引，沿 r_i - r_j
+                f_ji = mi * inv_r3
+                if relativistic:
+                    f_ji *= 1.0 + 3.0 * G * mi * inv_r * inv_c2
+                f -= f_ji
+            sx += f * dx
+            sy += f * dy
+            sz += f * dz
+    return sx, sy, sz
+
+
+def _mutual_acceleration_sum_pairs(src_pos, src_mass, G, min_dist, c, relativistic):
+    """
+    mutual_acceleration_sum的数组版本：以np.triu_indices一次取出全部无序对，供未安装numba时使用
+
+    Args:
+        同mutual_acceleration_sum
+
+    Returns:
+        Tuple[float, float, float]: 加速度之和 (sx, sy, sz)
+    """
+    i, j = np.triu_indices(src_pos.shape[0], 1)
+    d = src_pos[j] - src_pos[i]
+    d2 = np.einsum('ij,ij->i', d, d)
+    keep = d2 >= min_dist * min_dist
+    i, j, d, d2 = i[keep], j[keep], d[keep], d2[keep]
+    inv_r = 1.0 / np.sqrt(d2)
+    inv_r3 = G * inv_r * inv_r * inv_r
+    mi = src_mass[i]
+    mj = src_mass[j]
+    f_ij = np.where(mi > 1e-10, mj * inv_r3, 0.0)
+    f_ji = np.where(mj > 1e-10, mi * inv_r3, 0.0)
+    if relativistic:
+        inv_c2 = 1.0 / (c * c)
+        f_ij *= 1.0 + 3.0 * G * mj * inv_r * inv_c2
+        f_ji *= 1.0 + 3.0 * G * mi * inv_r * inv_c2
+    sx, sy, sz = ((f_ij - f_ji) @ d).tolist()
+    return sx, sy, sz
+
+
+if not NUMBA_AVAILABLE:
+    _mutual_acceleration_sum_loop = mutual_acceleration_sum
+
+    def mutual_acceleration_sum(src_pos, src_mass, G, min_dist, c, relativistic):
+        """
+        未安装numba时的mutual_acceleration_sum：引力源较少时逐对循环，较多时数组运算的固定开销更划算
+
+        下方各内核在无numba时以Python执行，经模块全局名调用到这里
+        """
+        if src_pos.shape[0] < PAIRS_MIN_SOURCES:
+            return _mutual_acceleration_sum_loop(src_pos, src_mass, G, min_dist, c, relativistic)
+        return _mutual_acceleration_sum_pairs(src_pos, src_mass, G, min_dist, c, relativistic)
+
+
+@njit(cache=True, fastmath=True)
+def total_acceleration(px, py, pz, mass, src_pos, src_mass, sx, sy, sz, G, min_dist, c,
+                       relativistic, perturbations, perturbation_scale):
+    """
+    星翎受到的总加速度：基本引力之和，加上闭式扰动项 (N-1)·ΣF_j - m·Σ_i a_i
+
+    Args:
+        px, py, pz: 星翎坐标
+        mass: 星翎质量
+        src_pos: 引力源坐标数组 (N, 3)
+        src_mass: 引力源质量数组 (N,)
+        sx, sy, sz: mutual_acceleration_sum的结果
+        G: 引力常数
+        min_dist: 引力作用最小距离
+        c: 光速常量
+        relativistic: 是否启用相对论修正
+        perturbations: 是否启用引力扰动
+        perturbation_scale: 扰动效应缩放因子
+
+    Returns:
+        Tuple[float, float, float]: 加速度 (ax, ay, az)
+    """
+    n = src_pos.shape[0]
+    min_dist2 = min_dist * min_dist
+    inv_c2 = 1.0 / (c * c)
+    fx = 0.0
+    fy = 0.0
+    fz = 0.0
+    for j in range(n):
+        dx = src_pos[j, 0] - px
+        dy = src_pos[j, 1] - py
+        dz = src_pos[j, 2] - pz
+        d2 = dx * dx + dy * dy + dz * dz
+        if d2 < min_dist2:
+            continue
+        inv_r = 1.0 / sqrt(d2)
+        f = G * src_mass[j] * mass * inv_r * inv_r * inv_r
+        if relativistic:
+            f *= 1.0 + 3.0 * G * src_mass[j] * inv_r * inv_c2
+        fx += f * dx
+        fy += f * dy
+        fz += f * dz
+    if perturbations and n >= 2:
+        k = (n - 1) * perturbation_scale
+        fx += k * fx - perturbation_scale * mass * sx
+        fy += k * fy - perturbation_scale * mass * sy
+        fz += k * fz - perturbation_scale * mass * sz
+    return fx / mass, fy / mass, fz / mass
+
+
+@njit(cache=True, fastmath=True)
+def rk4_step(px, py, pz, vx, vy, vz, mass, src_pos, src_mass, G, dt, min_dist, c,
+             relativistic, perturbations, perturbation_scale):
+    """
+    四阶Runge-Kutta单步积分；Σ_i a_i与星翎无关，四个阶段共用一次计算
+
+    Args:
+        px, py, pz: 星翎坐标
+        vx, vy, vz: 星翎速度
+        mass: 星翎质量
+        src_pos: 引力源坐标数组 (N, 3)
+        src_mass: 引力源质量数组 (N,)
+        G: 引力常数
+        dt: 时间步长
+        min_dist: 引力作用最小距离
+        c: 光速常量
+        relativistic: 是否启用相对论修正
+        perturbations: 是否启用引力扰动
+        perturbation_scale: 扰动效应缩放因子
+
+    Returns:
+        Tuple[float, ...]: (nx, ny, nz, nvx, nvy, nvz)
+    """
+    sx, sy, sz = mutual_acceleration_sum(src_pos, src_mass, G, min_dist, c, relativistic)
+    return _rk4(px, py, pz, vx, vy, vz, mass, src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+                relativistic, perturbations, perturbation_scale)
+
+
+@njit(cache=True, fastmath=True)
+def _rk4(px, py, pz, vx, vy, vz, mass, src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+         relativistic, perturbations, perturbation_scale):
+    """rk4_step的主体，Σ_i a_i由调用方给出"""
+    h = dt * 0.5
+    a1x, a1y, a1z = total_acceleration(px, py, pz, mass, src_pos, src_mass, sx, sy, sz,
+                                       G, min_dist, c, relativistic, perturbations, perturbation_scale)
+    v2x = vx + a1x * h
+    v2y = vy + a1y * h
+    v2z = vz + a1z * h
+    a2x, a2y, a2z = total_acceleration(px + vx * h, py + vy * h, pz + vz * h, mass, src_pos, src_mass,
+                                       sx, sy, sz, G, min_dist, c, relativistic, perturbations, perturbation_scale)
+    v3x = vx + a2x * h
+    v3y = vy + a2y * h
+    v3z = vz + a2z * h
+    a3x, a3y, a3z = total_acceleration(px + v2x * h, py + v2y * h, pz + v2z * h, mass, src_pos, src_mass,
+                                       sx, sy, sz, G, min_dist, c, relativistic, perturbations, perturbation_scale)
+    v4x = vx + a3x * dt
+    v4y = vy + a3y * dt
+    v4z = vz + a3z * dt
+    a4x, a4y, a4z = total_acceleration(px + v3x * dt, py + v3y * dt, pz + v3z * dt, mass, src_pos, src_mass,
+                                       sx, sy, sz, G, min_dist, c, relativistic, perturbations, perturbation_scale)
+    w = dt / 6.0
+    return (px + (vx + 2.0 * v2x + 2.0 * v3x + v4x) * w,
+            py + (vy + 2.0 * v2y + 2.0 * v3y + v4y) * w,
+            pz + (vz + 2.0 * v2z + 2.0 * v3z + v4z) * w,
+            vx + (a1x + 2.0 * a2x + 2.0 * a3x + a4x) * w,
+            vy + (a1y + 2.0 * a2y + 2.0 * a3y + a4y) * w,
+            vz + (a1z + 2.0 * a2z + 2.0 * a3z + a4z) * w)
+
+
+@njit(cache=True, fastmath=True)
+def rk2_step(px, py, pz, vx, vy, vz, mass, src_pos, src_mass, G, dt, min_dist, c,
+             relativistic, perturbations, perturbation_scale):
+    """
+    二阶Runge-Kutta（中点法）单步积分，参数与返回值同rk4_step
+    """
+    sx, sy, sz = mutual_acceleration_sum(src_pos, src_mass, G, min_dist, c, relativistic)
+    return _rk2(px, py, pz, vx, vy, vz, mass, src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+                relativistic, perturbations, perturbation_scale)
+
+
+@njit(cache=True, fastmath=True)
+def _rk2(px, py, pz, vx, vy, vz, mass, src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+         relativistic, perturbations, perturbation_scale):
+    """rk2_step的主体，Σ_i a_i由调用方给出"""
+    h = dt * 0.5
+    a1x, a1y, a1z = total_acceleration(px, py, pz, mass, src_pos, src_mass, sx, sy, sz,
+                                       G, min_dist, c, relativistic, perturbations, perturbation_scale)
+    v2x = vx + a1x * h
+    v2y = vy + a1y * h
+    v2z = vz + a1z * h
+    a2x, a2y, a2z = total_acceleration(px + vx * h, py + vy * h, pz + vz * h, mass, src_pos, src_mass,
+                                       sx, sy, sz, G, min_dist, c, relativistic, perturbations, perturbation_scale)
+    return (px + v2x * dt, py + v2y * dt, pz + v2z * dt,
+            vx + a2x * dt, vy + a2y * dt, vz + a2z * dt)
+
+
+@njit(cache=True, fastmath=True)
+def euler_step(px, py, pz, vx, vy, vz, mass, src_pos, src_mass, G, dt, min_dist, c,
+               relativistic, perturbations, perturbation_scale):
+    """
+    欧拉法单步积分，参数与返回值同rk4_step
+    """
+    sx, sy, sz = mutual_acceleration_sum(src_pos, src_mass, G, min_dist, c, relativistic)
+    return _euler(px, py, pz, vx, vy, vz, mass, src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+                  relativistic, perturbations, perturbation_scale)
+
+
+@njit(cache=True, fastmath=True)
+def _euler(px, py, pz, vx, vy, vz, mass, src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+           relativistic, perturbations, perturbation_scale):
+    """euler_step的主体，Σ_i a_i由调用方给出"""
+    ax, ay, az = total_acceleration(px, py, pz, mass, src_pos, src_mass, sx, sy, sz,
+                                    G, min_dist, c, relativistic, perturbations, perturbation_scale)
+    return (px + vx * dt, py + vy * dt, pz + vz * dt,
+            vx + ax * dt, vy + ay * dt, vz + az * dt)
+
+
+@njit(cache=True, fastmath=True)
+def verlet_step(px, py, pz, vx, vy, vz, ax, ay, az, mass, src_pos, src_mass, G, dt, min_dist, c,
+                relativistic, perturbations, perturbation_scale):
+    """
+    速度Verlet单步积分（辛积分器），每步只在新位置求一次加速度
+
+    Args:
+        ax, ay, az: 当前位置的加速度 a_old
+        其余参数同rk4_step
+
+    Returns:
+        Tuple[float, ...]: (nx, ny, nz, nvx, nvy, nvz, nax, nay, naz)，末三项为新位置的加速度
+    """
+    sx, sy, sz = mutual_acceleration_sum(src_pos, src_mass, G, min_dist, c, relativistic)
+    return _verlet(px, py, pz, vx, vy, vz, ax, ay, az, mass, src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+                   relativistic, perturbations, perturbation_scale)
+
+
+@njit(cache=True, fastmath=True)
+def _verlet(px, py, pz, vx, vy, vz, ax, ay, az, mass, src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+            relativistic, perturbations, perturbation_scale):
+    """verlet_step的主体，Σ_i a_i由调用方给出"""
+    h = dt * 0.5
+    nx = px + (vx + ax * h) * dt
+    ny = py + (vy + ay * h) * dt
+    nz = pz + (vz + az * h) * dt
+    nax, nay, naz = total_acceleration(nx, ny, nz, mass, src_pos, src_mass, sx, sy, sz,
+                                       G, min_dist, c, relativistic, perturbations, perturbation_scale)
+    return (nx, ny, nz,
+            vx + (ax + nax) * h, vy + (ay + nay) * h, vz + (az + naz) * h,
+            nax, nay, naz)
+
+
+@njit(cache=True, fastmath=True)
+def integrate_batch(method, positions, velocities, masses, src_pos, src_mass, G, dt, min_dist, c,
+                    relativistic, perturbations, perturbation_scale):
+    """
+    一次推进P个星翎：Σ_i a_i只算一次，每个星翎在同一组引力源下独立积分
+
+    Args:
+        method: 积分方法编号（EULER、RK2、RK4或VERLET）
+        positions: 星翎坐标数组 (P, 3)
+        velocities: 星翎速度数组 (P, 3)
+        masses: 星翎质量数组 (P,)
+        其余参数同rk4_step
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (新坐标, 新速度)
+    """
+    sx, sy, sz = mutual_acceleration_sum(src_pos, src_mass, G, min_dist, c, relativistic)
+    n = positions.shape[0]
+    new_positions = np.empty((n, 3))
+    new_velocities = np.empty((n, 3))
+    for p in range(n):
+        px = positions[p, 0]
+        py = positions[p, 1]
+        pz = positions[p, 2]
+        vx = velocities[p, 0]
+        vy = velocities[p, 1]
+        vz = velocities[p, 2]
+        if method == RK4:
+            r = _rk4(px, py, pz, vx, vy, vz, masses[p], src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+                     relativistic, perturbations, perturbation_scale)
+        elif method == VERLET:
+            ax, ay, az = total_acceleration(px, py, pz, masses[p], src_pos, src_mass, sx, sy, sz,
+                                            G, min_dist, c, relativistic, perturbations, perturbation_scale)
+            r = _verlet(px, py, pz, vx, vy, vz, ax, ay, az, masses[p], src_pos, src_mass, sx, sy, sz, G, dt,
+                        min_dist, c, relativistic, perturbations, perturbation_scale)[:6]
+        elif method == RK2:
+            r = _rk2(px, py, pz, vx, vy, vz, masses[p], src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+                     relativistic, perturbations, perturbation_scale)
+        else:
+            r = _euler(px, py, pz, vx, vy, vz, masses[p], src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+                       relativistic, perturbations, perturbation_scale)
+        (new_positions[p, 0], new_positions[p, 1], new_positions[p, 2],
+         new_velocities[p, 0], new_velocities[p, 1], new_velocities[p, 2]) = r
+    return new_positions, new_velocities
+
+
+@njit(cache=True, fastmath=True)
+def select_sources(px, py, pz, positions, masses, candidates, G, influence_threshold, max_sources):
+    """
+    在候选引力源中选出影响力 G·M/r² 最大的至多max_sources个，与GravityLoom.filter_gravity_sources_by_influence一致
+
+    Args:
+        px, py, pz: 星翎坐标
+        positions: 引力源坐标数组 (N, 3)
+        masses: 引力源质量数组 (N,)
+        candidates: 候选引力源的行号数组 (M,)
+        G: 引力常数
+        influence_threshold: 影响力阈值
+        max_sources: 最大保留数量
+
+    Returns:
+        np.ndarray: 入选者在candidates中的位置，按影响力降序，影响力相同时保持原顺序
+    """
+    chosen = np.empty(max(max_sources, 0), dtype=np.int64)
+    influence = np.empty(max(max_sources, 0))
+    count = 0
+    if max_sources <= 0:
+        return chosen
+    for c in range(candidates.shape[0]):
+        j = candidates[c]
+        dx = positions[j, 0] - px
+        dy = positions[j, 1] - py
+        dz = positions[j, 2] - pz
+        d2 = dx * dx + dy * dy + dz * dz
+        if d2 < 1e-20:
+            continue
+        value = G * masses[j] / d2
+        if value < influence_threshold:
+            continue
+        if count == max_sources and value <= influence[count - 1]:
+            continue
+        # 插入有序缓冲：只越过影响力严格更小者，相同影响力时先到者在前
+        k = count if count < max_sources else max_sources - 1
+        while k > 0 and influence[k - 1] < value:
+            chosen[k] = chosen[k - 1]
+            influence[k] = influence[k - 1]
+            k -= 1
+        chosen[k] = c
+        influence[k] = value
+        if count < max_sources:
+            count += 1
+    return chosen[:count]
+
+
+@njit(cache=True, fastmath=True)
+def select_and_integrate(method, px, py, pz, vx, vy, vz, mass, positions, masses, candidates,
+                         influence_threshold, max_sources, G, dt, min_dist, c,
+                         relativistic, perturbations, perturbation_scale):
+    """
+    一次完成引力源筛选与单步积分，省去筛选结果在Python中的往返
+
+    Args:
+        method: 积分方法编号（EULER、RK2或RK4）
+        candidates: 候选引力源的行号数组 (M,)
+        其余参数同select_sources与rk4_step
+
+    Returns:
+        Tuple[np.ndarray, Tuple[float, ...]]: (入选者在candidates中的位置, (nx, ny, nz, nvx, nvy, nvz))
+    """
+    chosen = select_sources(px, py, pz, positions, masses, candidates, G, influence_threshold, max_sources)
+    rows = candidates[chosen]
+    src_pos = positions[rows]
+    src_mass = masses[rows]
+    sx, sy, sz = mutual_acceleration_sum(src_pos, src_mass, G, min_dist, c, relativistic)
+    if method == RK4:
+        r = _rk4(px, py, pz, vx, vy, vz, mass, src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+                 relativistic, perturbations, perturbation_scale)
+    elif method == RK2:
+        r = _rk2(px, py, pz, vx, vy, vz, mass, src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+                 relativistic, perturbations, perturbation_scale)
+    else:
+        r = _euler(px, py, pz, vx, vy, vz, mass, src_pos, src_mass, sx, sy, sz, G, dt, min_dist, c,
+                   relativistic, perturbations, perturbation_scale)
+    return chosen, r
\ No newline at end of file
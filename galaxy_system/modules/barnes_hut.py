@@ -0,0 +1,291 @@
+"""
+Barnes–Hut八叉树：把引力源按空间递归分入八个卦限，远处的一簇引力源以其质心近似，
+使N个引力源两两之间的引力求和从O(N²)降为O(N log N)
+
+树以扁平数组（结构数组）存储：引力源按Morton码排序后每个节点覆盖排序数组中的一段连续区间，
+节点按层序编号，子节点编号连续，遍历内核可直接以即时编译执行
+"""
+from math import sqrt
+from typing import Tuple
+import numpy as np
+from .._jit import njit
+
+MORTON_BITS = 21  # 每个坐标轴的量化位数，三轴交织后恰好放入64位整数
+
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    """把21位整数的各位间隔两位展开，供三轴交织为Morton码"""
+    v = v.astype(np.uint64)
+    v = (v | (v << np.uint64(32))) & np.uint64(0x1f00000000ffff)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x1f0000ff0000ff)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x100f00f00f00f00f)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x10c30c30c30c30c3)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return v
+
+
+def morton_codes(positions: np.ndarray, origin: np.ndarray, width: float) -> np.ndarray:
+    """
+    计算各点在以origin为角点、边长width的立方体内的Morton码，x轴占最低位
+
+    Args:
+        positions: 坐标数组 (N, 3)
+        origin: 立方体最小角点 (3,)
+        width: 立方体边长
+
+    Returns:
+        np.ndarray: Morton码数组 (N,)，uint64
+    """
+    scale = (1 << MORTON_BITS) / width
+    q = np.clip(np.floor((positions - origin) * scale), 0, (1 << MORTON_BITS) - 1).astype(np.uint64)
+    return _spread_bits(q[:, 0]) | (_spread_bits(q[:, 1]) << np.uint64(1)) | (_spread_bits(q[:, 2]) << np.uint64(2))
+
+
+@njit(cache=True, fastmath=True)
+def _tree_acceleration(px, py, pz, node_cx, node_cy, node_cz, node_mass, node_width,
+                       node_start, node_end, node_first, node_count,
+                       sorted_pos, sorted_mass, G, theta, min_dist, own):
+    """
+    遍历扁平八叉树求某点受到的引力加速度，own为需排除的引力源在排序数组中的位置（-1表示不排除）
+
+    Returns:
+        Tuple[float, float, float]: 加速度 (ax, ay, az)
+    """
+    ax = 0.0
+    ay = 0.0
+    az = 0.0
+    min_d2 = min_dist * min_dist
+    theta2 = theta * theta
+    # 每层至多压入7个兄弟节点
+    stack = np.empty(8 * (MORTON_BITS + 2), dtype=np.int64)
+    stack[0] = 0
+    top = 1
+    while top > 0:
+        top -= 1
+        node = stack[top]
+        start = node_start[node]
+        end = node_end[node]
+        if node_count[node] == 0:
+            # 叶节点：逐个引力源精确求和
+            for k in range(start, end):
+                if k == own:
+                    continue
+                dx = sorted_pos[k, 0] - px
+                dy = sorted_pos[k, 1] - py
+                dz = sorted_pos[k, 2] - pz
+                d2 = dx * dx + dy * dy + dz * dz
+                if d2 < min_d2:
+                    continue
+                inv_r = 1.0 / sqrt(d2)
+                f = G * sorted_mass[k] * inv_r * inv_r * inv_r
+                ax += f * dx
+                ay += f * dy
+                az += f * dz
+            continue
+        dx = node_cx[node] - px
+        dy = node_cy[node] - py
+        dz = node_cz[node] - pz
+        d2 = dx * dx + dy * dy + dz * dz
+        contains_self = start <= own < end
+        if not contains_self and node_width[node] * node_width[node] < theta2 * d2:
+            # 足够远：整簇以质心近似
+            if d2 < min_d2:
+                continue
+            inv_r = 1.0 / sqrt(d2)
+            f = G * node_mass[node] * inv_r * inv_r * inv_r
+            ax += f * dx
+            ay += f * dy
+            az += f * dz
+        else:
+            first = node_first[node]
+            for c in range(node_count[node]):
+                stack[top] = first + c
+                top += 1
+    return ax, ay, az
+
+
+@njit(cache=True, fastmath=True)
+def _tree_mutual_sum(node_cx, node_cy, node_cz, node_mass, node_width,
+                     node_start, node_end, node_first, node_count,
+                     sorted_pos, sorted_mass, G, theta, min_dist, min_mass):
+    """对排序数组中每个质量大于min_mass的引力源遍历一次八叉树，累加其受到的加速度"""
+    sx = 0.0
+    sy = 0.0
+    sz = 0.0
+    for k in range(sorted_mass.shape[0]):
+        if sorted_mass[k] <= min_mass:
+            continue
+        ax, ay, az = _tree_acceleration(sorted_pos[k, 0], sorted_pos[k, 1], sorted_pos[k, 2],
+                                        node_cx, node_cy, node_cz, node_mass, node_width,
+                                        node_start, node_end, node_first, node_count,
+                                        sorted_pos, sorted_mass, G, theta, min_dist, k)
+        sx += ax
+        sy += ay
+        sz += az
+    return sx, sy, sz
+
+
+class BarnesHutTree:
+    """Barnes–Hut八叉树：由引力源坐标与质量一次建成，供多次引力求和复用"""
+    MAX_DEPTH = MORTON_BITS  # Morton码分辨率耗尽（重合的引力源）时直接作为叶节点
+
+    def __init__(self, positions: np.ndarray, masses: np.ndarray):
+        """
+        建立八叉树：按Morton码排序引力源，自顶向下按码位切分出节点，再自底向上汇总质量与质心
+
+        Args:
+            positions: 引力源坐标数组 (N, 3)
+            masses: 引力源质量数组 (N,)
+        """
+        self.positions = np.ascontiguousarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.masses = np.ascontiguousarray(masses, dtype=np.float64).reshape(-1)
+        n = len(self.masses)
+        self._mutual_cache = {}
+        if n == 0:
+            self.order = np.arange(0)
+            self.rank = np.empty(0, dtype=np.intp)
+            self.sorted_positions = self.positions
+            self.sorted_masses = self.masses
+            self._set_nodes([], [], [], [], [], [], [], [])
+            self.node_count = np.zeros(0, dtype=np.int64)
+            return
+        lo = self.positions.min(axis=0)
+        hi = self.positions.max(axis=0)
+        center = (lo + hi) * 0.5
+        width = float((hi - lo).max()) or 1.0
+
+        # order为Morton序排列：每个节点覆盖order[start:end]，rank[i]为引力源i在order中的位置
+        codes = morton_codes(self.positions, center - width * 0.5, width)
+        self.order = np.argsort(codes, kind='stable')
+        self.rank = np.empty(n, dtype=np.intp)
+        self.rank[self.order] = np.arange(n)
+        codes = codes[self.order]
+        self.sorted_positions = np.ascontiguousarray(self.positions[self.order])
+        self.sorted_masses = np.ascontiguousarray(self.masses[self.order])
+
+        # 自顶向下按层序切分：同一节点的子节点编号连续
+        node_start = [0]
+        node_end = [n]
+        node_depth = [0]
+        node_first = [0]
+        node_count = [0]
+        octants = np.arange(9, dtype=np.uint64)
+        i = 0
+        while i < len(node_start):
+            start, end, depth = node_start[i], node_end[i], node_depth[i]
+            if end - start > 1 and depth < self.MAX_DEPTH:
+                shift = np.uint64(3 * (self.MAX_DEPTH - 1 - depth))
+                octant = (codes[start:end] >> shift) & np.uint64(7)
+                bounds = (start + np.searchsorted(octant, octants)).tolist()
+                node_first[i] = len(node_start)
+                for code in range(8):
+                    if bounds[code + 1] > bounds[code]:
+                        node_start.append(bounds[code])
+                        node_end.append(bounds[code + 1])
+                        node_depth.append(depth + 1)
+                        node_first.append(0)
+                        node_count.append(0)
+                        node_count[i] += 1
+            i += 1
+
+        # 叶节点恰好划分整个排序数组，按起点排序后一次reduceat求出各叶的质量、质量加权坐标和坐标之和
+        count = len(node_start)
+        node_mass = [0.0] * count
+        weighted = [(0.0, 0.0, 0.0)] * count
+        summed = [(0.0, 0.0, 0.0)] * count
+        leaves = sorted((s, k) for k, s in enumerate(node_start) if node_count[k] == 0)
+        leaf_starts = [s for s, _ in leaves]
+        leaf_mass = np.add.reduceat(self.sorted_masses, leaf_starts).tolist()
+        leaf_weighted = np.add.reduceat(self.sorted_positions * self.sorted_masses[:, None], leaf_starts, axis=0).tolist()
+        leaf_summed = np.add.reduceat(self.sorted_positions, leaf_starts, axis=0).tolist()
+        for j, (_, k) in enumerate(leaves):
+            node_mass[k] = leaf_mass[j]
+            weighted[k] = leaf_weighted[j]
+            summed[k] = leaf_summed[j]
+        # 层序编号中子节点总在父节点之后，逆序遍历即可自底向上汇总
+        for k in range(count - 1, -1, -1):
+            if node_count[k]:
+                children = range(node_first[k], node_first[k] + node_count[k])
+                node_mass[k] = sum(node_mass[c] for c in children)
+                weighted[k] = tuple(sum(weighted[c][a] for c in children) for a in range(3))
+                summed[k] = tuple(sum(summed[c][a] for c in children) for a in range(3))
+        com = [
+            (w[0] / m, w[1] / m, w[2] / m) if m > 0 else
+            (p[0] / (e - s), p[1] / (e - s), p[2] / (e - s))
+            for m, w, p, s, e in zip(node_mass, weighted, summed, node_start, node_end)
+        ]
+        node_width = [width / (1 << d) for d in node_depth]
+        self._set_nodes(node_start, node_end, node_first, node_width, node_mass,
+                        [c[0] for c in com], [c[1] for c in com], [c[2] for c in com])
+        self.node_count = np.asarray(node_count, dtype=np.int64)
+
+    def _set_nodes(self, start, end, first, width, mass, cx, cy, cz):
+        """以连续数组保存节点属性"""
+        self.node_start = np.asarray(start, dtype=np.int64)
+        self.node_end = np.asarray(end, dtype=np.int64)
+        self.node_first = np.asarray(first, dtype=np.int64)
+        self.node_width = np.asarray(width, dtype=np.float64)
+        self.node_mass = np.asarray(mass, dtype=np.float64)
+        self.node_cx = np.asarray(cx, dtype=np.float64)
+        self.node_cy = np.asarray(cy, dtype=np.float64)
+        self.node_cz = np.asarray(cz, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.masses)
+
+    def _node_arrays(self) -> tuple:
+        """遍历内核所需的节点数组"""
+        return (self.node_cx, self.node_cy, self.node_cz, self.node_mass, self.node_width,
+                self.node_start, self.node_end, self.node_first, self.node_count)
+
+    def acceleration(self, point: Tuple[float, float, float], gravity_constant: float, theta: float,
+                     min_distance: float, exclude: int = -1) -> Tuple[float, float, float]:
+        """
+        遍历八叉树求某点受到的引力加速度 G·M·(r_j - r)/|r_j - r|³
+
+        节点边长与距离之比小于theta时以节点质心近似，否则展开子节点；
+        距离小于min_distance的作用视为零，与GravityLoom.calculate_gravity_force一致
+
+        Args:
+            point: 受力点坐标 (x, y, z)
+            gravity_constant: 引力常数
+            theta: 张角阈值，为0时退化为逐个引力源精确求和
+            min_distance: 引力作用最小距离
+            exclude: 需排除的引力源下标（受力点本身是引力源时），-1表示不排除
+
+        Returns:
+            Tuple[float, float, float]: 加速度 (ax, ay, az)
+        """
+        if len(self.masses) == 0:
+            return 0.0, 0.0, 0.0
+        px, py, pz = point
+        own = int(self.rank[exclude]) if exclude >= 0 else -1
+        return _tree_acceleration(float(px), float(py), float(pz), *self._node_arrays(),
+                                  self.sorted_positions, self.sorted_masses,
+                                  float(gravity_constant), float(theta), float(min_distance), own)
+
+    def mutual_acceleration_sum(self, gravity_constant: float, theta: float, min_distance: float,
+                                min_mass: float = 0.0) -> Tuple[float, float, float]:
+        """
+        求各引力源受其余引力源的引力加速度之和 Σ_i a_i，结果只取决于引力源本身，按参数缓存
+
+        Args:
+            gravity_constant: 引力常数
+            theta: 张角阈值
+            min_distance: 引力作用最小距离
+            min_mass: 质量不超过该值的引力源不计入求和
+
+        Returns:
+            Tuple[float, float, float]: 加速度之和 (sx, sy, sz)
+        """
+        key = (gravity_constant, theta, min_distance, min_mass)
+        cached = self._mutual_cache.get(key)
+        if cached is not None:
+            return cached
+        if len(self.masses) == 0:
+            result = (0.0, 0.0, 0.0)
+        else:
+            result = _tree_mutual_sum(*self._node_arrays(), self.sorted_positions, self.sorted_masses,
+                                      float(gravity_constant), float(theta), float(min_distance), float(min_mass))
+        self._mutual_cache[key] = result
+        return result
\ No newline at end of file
@@ -1 +1,3 @@
-"""边界效果模块"""
\ No newline at end of file
+"""边界效果模块"""
+# 导入子模块，使各界域回廊登记到BOUNDARY_REGISTRY
+from . import infinite, reflective
\ No newline at end of file
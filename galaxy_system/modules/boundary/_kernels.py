@@ -0,0 +1,220 @@
+"""
+界域回廊的批量数值内核：直接读写星翎的结构数组，一次处理全部星翎
+"""
+from math import sqrt
+import numpy as np
+from ..._jit import njit
+
+SPEED_DAMPING = 0.6      # 边际之诗后的速度保留比例
+WARP_OFFSET_RATIO = 0.05  # 镜渊镜像沿速度方向的偏移占边界半径的比例
+
+
+@njit(cache=True, fastmath=True)
+def check_collision_batch(positions, radius):
+    """
+    检查每个星翎是否轻触界域，越界者原地修正到边界内95%处
+
+    Args:
+        positions: 星翎坐标数组 (N, 3)，会被原地修改
+        radius: 边界半径
+
+    Returns:
+        np.ndarray: 碰撞掩码 (N,)
+    """
+    n = positions.shape[0]
+    hits = np.zeros(n, dtype=np.bool_)
+    radius_sq = radius * radius
+    for i in range(n):
+        px = positions[i, 0]
+        py = positions[i, 1]
+        pz = positions[i, 2]
+        d2 = px * px + py * py + pz * pz
+        # 常见的界内情形只比较平方模长，越界时才开方
+        if d2 < radius_sq:
+            continue
+        hits[i] = True
+        if d2 > radius_sq:
+            factor = 0.95 * radius / sqrt(d2)
+            positions[i, 0] = px * factor
+            positions[i, 1] = py * factor
+            positions[i, 2] = pz * factor
+    return hits
+
+
+@njit(cache=True, fastmath=True)
+def mirror_warp(px, py, pz, vx, vy, vz, radius, offset):
+    """
+    镜渊镜像：穿过原点落到另一侧边界，并沿速度方向偏移5%半径，速度衰减至60%
+
+    Args:
+        px, py, pz: 星翎坐标
+        vx, vy, vz: 星翎速度
+        radius: 边界半径
+        offset: 沿速度方向的偏移量，即 radius * WARP_OFFSET_RATIO
+
+    Returns:
+        Tuple[float, ...]: (nx, ny, nz, nvx, nvy, nvz)
+    """
+    r = sqrt(px * px + py * py + pz * pz)
+    inv_r = 1.0 / r if r > 0 else 0.0
+    v = sqrt(vx * vx + vy * vy + vz * vz)
+    inv_v = 1.0 / v if v > 0 else 0.0
+    return (-px * inv_r * radius + vx * inv_v * offset,
+            -py * inv_r * radius + vy * inv_v * offset,
+            -pz * inv_r * radius + vz * inv_v * offset,
+            vx * SPEED_DAMPING, vy * SPEED_DAMPING, vz * SPEED_DAMPING)
+
+
+@njit(cache=True, fastmath=True)
+def mirror_scatter(vx, vy, vz, radius, sin_theta, cos_theta, sin_phi, cos_phi):
+    """
+    镜渊飘散：落到边界上的随机点，速度指向原点并衰减至60%
+
+    Args:
+        vx, vy, vz: 星翎速度
+        radius: 边界半径
+        sin_theta, cos_theta: 方位角的正弦与余弦
+        sin_phi, cos_phi: 仰角的正弦与余弦
+
+    Returns:
+        Tuple[float, ...]: (nx, ny, nz, nvx, nvy, nvz)
+    """
+    dx = sin_phi * cos_theta
+    dy = sin_phi * sin_theta
+    dz = cos_phi
+    speed = sqrt(vx * vx + vy * vy + vz * vz) * SPEED_DAMPING
+    return dx * radius, dy * radius, dz * radius, -dx * speed, -dy * speed, -dz * speed
+
+
+@njit(cache=True, fastmath=True)
+def prismic_reflect(px, py, pz, vx, vy, vz, reflection_angle, sin_theta, cos_theta, sin_phi, cos_phi, dt):
+    """
+    虹光回音：镜面反射指向原点，漫反射在以位置方向为轴的锥体内随机折返，速度衰减至60%
+
+    Args:
+        px, py, pz: 星翎坐标
+        vx, vy, vz: 星翎速度
+        reflection_angle: 反射角，为0时镜面反射
+        sin_theta, cos_theta: 方位角的正弦与余弦，仅漫反射使用
+        sin_phi, cos_phi: 锥角的正弦与余弦，仅漫反射使用
+        dt: 时间步长
+
+    Returns:
+        Tuple[float, ...]: (nx, ny, nz, nvx, nvy, nvz)
+    """
+    speed = sqrt(vx * vx + vy * vy + vz * vz)
+    r = sqrt(px * px + py * py + pz * pz)
+    inv_r = 1.0 / r if r > 0 else 0.0
+    # 位置方向单位向量
+    dx = px * inv_r
+    dy = py * inv_r
+    dz = pz * inv_r
+    if reflection_angle == 0:
+        # 镜面反射：直接指向原点
+        nx = -dx
+        ny = -dy
+        nz = -dz
+    else:
+        # 以位置方向为轴构建局部正交基（Duff等人的构造，基向量天然为单位长度，无需开方归一化）
+        sign = 1.0 if dz >= 0.0 else -1.0
+        k = -1.0 / (sign + dz)
+        m = dx * dy * k
+        ax = 1.0 + sign * dx * dx * k
+        ay = sign * m
+        az = -sign * dx
+        bx = m
+        by = sign + dy * dy * k
+        bz = -dy
+        ca = sin_phi * cos_theta
+        cb = sin_phi * sin_theta
+        nx = dx * cos_phi + ax * ca + bx * cb
+        ny = dy * cos_phi + ay * ca + by * cb
+        nz = dz * cos_phi + az * ca + bz * cb
+        # 确保方向指向内部（与位置向量相反）
+        if nx * dx + ny * dy + nz * dz > 0:
+            nx = -nx
+            ny = -ny
+            nz = -nz
+    scale = speed * SPEED_DAMPING
+    nvx = nx * scale
+    nvy = ny * scale
+    nvz = nz * scale
+    return px + nvx * dt, py + nvy * dt, pz + nvz * dt, nvx, nvy, nvz
+
+
+@njit(cache=True, fastmath=True)
+def mirror_warp_batch(positions, velocities, radius, offset):
+    """
+    批量镜渊镜像，逐行调用mirror_warp
+
+    Args:
+        positions: 星翎坐标数组 (N, 3)
+        velocities: 星翎速度数组 (N, 3)
+        radius: 边界半径
+        offset: 沿速度方向的偏移量
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (新坐标, 新速度)
+    """
+    n = positions.shape[0]
+    new_positions = np.empty((n, 3))
+    new_velocities = np.empty((n, 3))
+    for i in range(n):
+        (new_positions[i, 0], new_positions[i, 1], new_positions[i, 2],
+         new_velocities[i, 0], new_velocities[i, 1], new_velocities[i, 2]) = mirror_warp(
+            positions[i, 0], positions[i, 1], positions[i, 2],
+            velocities[i, 0], velocities[i, 1], velocities[i, 2], radius, offset)
+    return new_positions, new_velocities
+
+
+@njit(cache=True, fastmath=True)
+def mirror_scatter_batch(velocities, radius, sin_theta, cos_theta, sin_phi, cos_phi):
+    """
+    批量镜渊飘散，逐行调用mirror_scatter
+
+    Args:
+        velocities: 星翎速度数组 (N, 3)
+        radius: 边界半径
+        sin_theta, cos_theta: 每个星翎方位角的正弦与余弦 (N,)
+        sin_phi, cos_phi: 每个星翎仰角的正弦与余弦 (N,)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (新坐标, 新速度)
+    """
+    n = velocities.shape[0]
+    new_positions = np.empty((n, 3))
+    new_velocities = np.empty((n, 3))
+    for i in range(n):
+        (new_positions[i, 0], new_positions[i, 1], new_positions[i, 2],
+         new_velocities[i, 0], new_velocities[i, 1], new_velocities[i, 2]) = mirror_scatter(
+            velocities[i, 0], velocities[i, 1], velocities[i, 2], radius,
+            sin_theta[i], cos_theta[i], sin_phi[i], cos_phi[i])
+    return new_positions, new_velocities
+
+
+@njit(cache=True, fastmath=True)
+def prismic_reflect_batch(positions, velocities, reflection_angle, sin_theta, cos_theta, sin_phi, cos_phi, dt):
+    """
+    批量虹光回音，逐行调用prismic_reflect
+
+    Args:
+        positions: 星翎坐标数组 (N, 3)
+        velocities: 星翎速度数组 (N, 3)
+        reflection_angle: 反射角，为0时镜面反射
+        sin_theta, cos_theta: 每个星翎方位角的正弦与余弦 (N,)，仅漫反射使用
+        sin_phi, cos_phi: 每个星翎锥角的正弦与余弦 (N,)，仅漫反射使用
+        dt: 时间步长
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (新坐标, 新速度)
+    """
+    n = positions.shape[0]
+    new_positions = np.empty((n, 3))
+    new_velocities = np.empty((n, 3))
+    for i in range(n):
+        (new_positions[i, 0], new_positions[i, 1], new_positions[i, 2],
+         new_velocities[i, 0], new_velocities[i, 1], new_velocities[i, 2]) = prismic_reflect(
+            positions[i, 0], positions[i, 1], positions[i, 2],
+            velocities[i, 0], velocities[i, 1], velocities[i, 2],
+            reflection_angle, sin_theta[i], cos_theta[i], sin_phi[i], cos_phi[i], dt)
+    return new_positions, new_velocities
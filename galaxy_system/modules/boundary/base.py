@@ -1,13 +1,18 @@
+import random
 from abc import ABC, abstractmethod
-import math
-from typing import Tuple
+from math import sin, cos, pi
+from typing import Dict, Tuple, Type
+import numpy as np
 from ...models.celestial_plume import CelestialPlume
 from ...models.vector3d import Vector3D
+from . import _kernels
+
+_TWO_PI = 2.0 * pi
 
 class BoundaryAtrium(ABC):
     """界域回廊：根据不同的星穹边际法则，计算星翎是否轻触界域，在减速60%后触发边际之诗"""
     
-    def __init__(self, type: str, boundary_radius: float, reflection_angle: float, reflection_angle_range: float = math.pi/3):
+    def __init__(self, type: str, boundary_radius: float, reflection_angle: float, reflection_angle_range: float = pi/3):
         """
         初始化边界效果
         
@@ -16,8 +21,46 @@ class BoundaryAtrium(ABC):
         """
         self.type = type
         self.boundary_radius = boundary_radius
+        self._boundary_radius_sq = boundary_radius * boundary_radius
         self.reflection_angle = reflection_angle
         self.reflection_angle_range = reflection_angle_range
+        self._rng = None  # 批量抽样的随机数发生器，首次批量抽样时创建
+    
+    @property
+    def rng(self) -> np.random.Generator:
+        """获取批量抽样的随机数发生器：种子取自random模块，random.seed仍可复现边界处理"""
+        if self._rng is None:
+            self._rng = np.random.default_rng(random.getrandbits(64))
+        return self._rng
+    
+    def draw_angles(self, n: int, phi_range: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        一次性为n个星翎抽取随机方位角与仰角，并批量求出正余弦
+        
+        Args:
+            n: 星翎数量
+            phi_range: 仰角上限
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: (sin_theta, cos_theta, sin_phi, cos_phi)
+        """
+        theta = self.rng.uniform(0, _TWO_PI, size=n)
+        phi = self.rng.uniform(0, phi_range, size=n)
+        return np.sin(theta), np.cos(theta), np.sin(phi), np.cos(phi)
+    
+    def draw_angle(self, phi_range: float) -> Tuple[float, float, float, float]:
+        """
+        为单个星翎抽取随机方位角与仰角的正余弦；标量抽样直接用random模块，比逐次调用numpy发生器快
+        
+        Args:
+            phi_range: 仰角上限
+            
+        Returns:
+            Tuple[float, float, float, float]: (sin_theta, cos_theta, sin_phi, cos_phi)
+        """
+        theta = random.uniform(0, _TWO_PI)
+        phi = random.uniform(0, phi_range)
+        return sin(theta), cos(theta), sin(phi), cos(phi)
     
     def check_collision(self, point: CelestialPlume) -> bool:
         """
@@ -25,29 +68,73 @@ class BoundaryAtrium(ABC):
         
         Args:
             point: 星翎对象
-            astral_canopy: 星穹领域对象
             
         Returns:
             bool: 是否碰撞
         """
-        # 如果位置在边界外，先修正到边界内95%处
-        position_magnitude = point.position.magnitude()
-        if position_magnitude > self.boundary_radius:
-            correction_factor = 0.95 * self.boundary_radius / position_magnitude
-            point.position = point.position * correction_factor
-            return True
+        x, y, z = point.position_array.tolist()
+        if x * x + y * y + z * z < self._boundary_radius_sq:
+            return False  # 界内无需开方，也无需进入批量内核
+        return bool(self.check_collision_batch(point.position_array.reshape(1, 3))[0])
+    
+    def check_collision_batch(self, positions: np.ndarray) -> np.ndarray:
+        """
+        批量检查星翎是否与界域碰撞，越界者原地修正到边界内95%处
+        
+        Args:
+            positions: 星翎坐标数组 (N, 3)
             
-        return position_magnitude >= self.boundary_radius
+        Returns:
+            np.ndarray: 碰撞掩码 (N,)
+        """
+        return _kernels.check_collision_batch(positions, self.boundary_radius)
     
-    @abstractmethod
-    def handle_collision(self, point: CelestialPlume) -> Tuple[Vector3D, Vector3D]:
+    def handle_collision(self, point: CelestialPlume, dt: float) -> Tuple[Vector3D, Vector3D]:
         """
         处理边际之诗
         
         Args:
             point: 星翎对象
+            dt: 时间步长
+            
+        Returns:
+            Tuple[Vector3D, Vector3D]: 处理后的位置与速度
+        """
+        new_positions, new_velocities = self.handle_collision_batch(
+            point.position_array.reshape(1, 3), point.velocity_array.reshape(1, 3), dt
+        )
+        return Vector3D.from_array(new_positions[0]), Vector3D.from_array(new_velocities[0])
+    
+    @abstractmethod
+    def handle_collision_batch(self, positions: np.ndarray, velocities: np.ndarray, dt: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量处理边际之诗
+        
+        Args:
+            positions: 星翎坐标数组 (N, 3)
+            velocities: 星翎速度数组 (N, 3)
+            dt: 时间步长
             
         Returns:
-            Vector3D: 处理后的位置
+            Tuple[np.ndarray, np.ndarray]: (新坐标, 新速度)
         """
-        pass
\ No newline at end of file
+        pass
+
+
+BOUNDARY_REGISTRY: Dict[str, Type[BoundaryAtrium]] = {}  # 界域类型 -> 界域回廊类
+
+
+def register_boundary(boundary_type: str):
+    """
+    类装饰器：将界域回廊子类登记到BOUNDARY_REGISTRY
+    
+    Args:
+        boundary_type: 界域类型名称
+        
+    Returns:
+        Callable: 原样返回被装饰类的装饰器
+    """
+    def decorator(cls: Type[BoundaryAtrium]) -> Type[BoundaryAtrium]:
+        BOUNDARY_REGISTRY[boundary_type] = cls
+        return cls
+    return decorator
\ No newline at end of file
@@ -1,14 +1,16 @@
 from typing import Tuple
-import math
-import random
-from .base import BoundaryAtrium
+from math import pi
+import numpy as np
+from .base import BoundaryAtrium, register_boundary
+from . import _kernels
 from ...models.celestial_plume import CelestialPlume
 from ...models.vector3d import Vector3D
 
+@register_boundary("infinite")
 class MirrorAbyssGate(BoundaryAtrium):
     """镜渊之门：星翎抵达边际时，将穿过星穹原点，如露滴坠入镜渊另一侧"""
     
-    def __init__(self, boundary_radius: float, reflection_angle: float = 0, reflection_angle_range: float = math.pi):
+    def __init__(self, boundary_radius: float, reflection_angle: float = 0, reflection_angle_range: float = pi):
         """
         初始化无限边界效果
         
@@ -16,55 +18,54 @@ class MirrorAbyssGate(BoundaryAtrium):
             reflection_angle: 反射角
         """
         super().__init__("infinite", boundary_radius, reflection_angle, reflection_angle_range)
+        self._warp_offset = boundary_radius * _kernels.WARP_OFFSET_RATIO  # 镜像偏移量，构造时一次算好
+        # 反射角构造后不再变化：镜像与飘散两种子模式在此一次选定，碰撞处理时不再逐次判断
+        if reflection_angle == 0:
+            self._collide, self._collide_batch = self._warp, self._warp_batch
+        else:
+            self._collide, self._collide_batch = self._scatter, self._scatter_batch
     
     def handle_collision(self, point: CelestialPlume, dt: float) -> Tuple[Vector3D, Vector3D]:
         """
-        处理镜渊之门边际之诗
+        处理镜渊之门边际之诗，全程以浮点局部变量计算，仅在返回时构造向量
         
         Args:
             point: 星翎对象
             dt: 时间步长
             
         Returns:
-            Vector3D: 处理后的位置
+            Tuple[Vector3D, Vector3D]: 处理后的位置与速度
+        """
+        nx, ny, nz, nvx, nvy, nvz = self._collide(point.position_array.tolist(), point.velocity_array.tolist())
+        return Vector3D(nx, ny, nz), Vector3D(nvx, nvy, nvz)
+    
+    def handle_collision_batch(self, positions: np.ndarray, velocities: np.ndarray, dt: float) -> Tuple[np.ndarray, np.ndarray]:
         """
-        origin_point = Vector3D(0, 0, 0)  # 星系原点
-        # 计算从原点到当前位置的向量
-        position_vector = point.position - origin_point
+        批量处理镜渊之门边际之诗
         
-        # 计算速度方向单位向量
-        velocity_direction = point.velocity.normalize()
-
-        if self.reflection_angle == 0:
-            # 镜面反射非随机位置：穿过参考原点落到另外一边
-            # 将位置向量反向，并缩小距离，确保不会立即再次超出阈值
-            warped_position_vector = position_vector.normalize() * (-self.boundary_radius)
-            
-            # 首先计算穿越后的位置，确保穿越后的位置、初始质点和穿越前的位置在一条直线上
-            base_warped_position = origin_point + warped_position_vector
-            
-            # 然后在穿越后的位置基础上添加偏移量，偏移方向与速度方向相同
-            offset = velocity_direction * (self.boundary_radius * 0.05)  # 偏移量为安全距离的5%
-            warped_position = base_warped_position + offset
-            new_velocity = point.velocity * 0.6
-        else:
-            # 随机位置：在球形边界上的任意一个点
-            # 使用球面坐标生成随机方向
-            theta = random.uniform(0, 2 * math.pi)  # 方位角
-            phi = random.uniform(0, math.pi)  # 仰角，覆盖整个球面
-            
-            # 将球面坐标转换为笛卡尔坐标
-            x = math.sin(phi) * math.cos(theta)
-            y = math.sin(phi) * math.sin(theta)
-            z = math.cos(phi)
-            
-            # 创建随机方向的单位向量
-            random_direction = Vector3D(x, y, z)
-            
-            # 计算warp后的位置
-            warped_position = origin_point + random_direction * self.boundary_radius
-            # 计算从当前位置指向原点的单位向量
-            direction_to_origin = (origin_point - warped_position).normalize()
+        Args:
+            positions: 星翎坐标数组 (N, 3)
+            velocities: 星翎速度数组 (N, 3)
+            dt: 时间步长
             
-            new_velocity = direction_to_origin * (point.velocity.magnitude() * 0.6)
-        return warped_position, new_velocity
\ No newline at end of file
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (新坐标, 新速度)
+        """
+        return self._collide_batch(positions, velocities)
+    
+    def _warp(self, position, velocity) -> Tuple[float, ...]:
+        """镜面反射非随机位置：穿过参考原点落到另外一边"""
+        return _kernels.mirror_warp(*position, *velocity, self.boundary_radius, self._warp_offset)
+    
+    def _scatter(self, position, velocity) -> Tuple[float, ...]:
+        """随机位置：在球形边界上的任意一个点，仰角覆盖整个球面"""
+        return _kernels.mirror_scatter(*velocity, self.boundary_radius, *self.draw_angle(pi))
+    
+    def _warp_batch(self, positions: np.ndarray, velocities: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """批量镜像，见_warp"""
+        return _kernels.mirror_warp_batch(positions, velocities, self.boundary_radius, self._warp_offset)
+    
+    def _scatter_batch(self, positions: np.ndarray, velocities: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """批量飘散，见_scatter"""
+        sin_theta, cos_theta, sin_phi, cos_phi = self.draw_angles(len(positions), pi)
+        return _kernels.mirror_scatter_batch(velocities, self.boundary_radius, sin_theta, cos_theta, sin_phi, cos_phi)
\ No newline at end of file
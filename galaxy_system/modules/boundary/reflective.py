@@ -1,14 +1,19 @@
 from typing import Tuple
-import math
-import random
-from .base import BoundaryAtrium
+from math import pi
+import numpy as np
+from .base import BoundaryAtrium, register_boundary
+from . import _kernels
 from ...models.celestial_plume import CelestialPlume
 from ...models.vector3d import Vector3D
 
+_SPECULAR_ANGLES = (0.0, 0.0, 0.0, 0.0)  # 镜面反射所用的占位角度正余弦
+
+
+@register_boundary("reflective")
 class PrismicEchoWall(BoundaryAtrium):
     """虹光回音壁：根据晨雾折射角奏响回音"""
     
-    def __init__(self, boundary_radius: float, reflection_angle: float = 0, reflection_angle_range: float = math.pi/3):
+    def __init__(self, boundary_radius: float, reflection_angle: float = 0, reflection_angle_range: float = pi/3):
         """
         初始化反射边界效果
         
@@ -16,67 +21,55 @@ class PrismicEchoWall(BoundaryAtrium):
             reflection_angle: 反射角
         """
         super().__init__("reflective", boundary_radius, reflection_angle, reflection_angle_range)
+        # 反射角构造后不再变化：镜面与漫反射两种子模式在此一次选定，碰撞处理时不再逐次判断
+        if reflection_angle == 0:
+            self._draw, self._draw_batch = self._specular_angles, self._specular_angles_batch
+        else:
+            self._draw, self._draw_batch = self._diffuse_angles, self._diffuse_angles_batch
     
     def handle_collision(self, point: CelestialPlume, dt: float) -> Tuple[Vector3D, Vector3D]:
         """
-        处理虹光回音壁边际之诗
+        处理虹光回音壁边际之诗，全程以浮点局部变量计算，仅在返回时构造向量
         
         Args:
             point: 星翎对象
             dt: 时间步长
             
         Returns:
-            Vector3D: 处理后的位置
+            Tuple[Vector3D, Vector3D]: 处理后的位置与速度
         """
-        origin_point = Vector3D(0, 0, 0)  # 星系原点
-        # 计算当前速度大小
-        current_speed = point.velocity.magnitude()
-        # 计算回音
-        if self.reflection_angle == 0:
-            # 镜面反射：直接指向规则参考原点
-            new_direction = (origin_point - point.position).normalize()
-        else:
-           # 漫反射：在指定角度范围内随机反射
-           # 计算从原点到当前位置的向量
-           position_vector = point.position - Vector3D(0,0,0)
-           position_direction = position_vector.normalize()
-
-           # 生成随机的反射方向
-           # 使用球面坐标生成随机方向
-           theta = random.uniform(0, 2 * math.pi)  # 方位角
-           phi = random.uniform(0, self.reflection_angle_range)  # 仰角，限制在反射角度范围内
-           
-           # 将球面坐标转换为笛卡尔坐标
-           # 首先创建一个相对于位置向量的局部坐标系
-           # 需要两个正交向量来构建坐标系
-           
-           # 选择一个不与position_direction平行的参考向量
-           if abs(position_direction.x) < 0.9:
-               ref_vector = Vector3D(1, 0, 0)
-           else:
-               ref_vector = Vector3D(0, 1, 0)
-           
-           # 计算第一个正交向量
-           ortho1 = position_direction.cross(ref_vector).normalize()
-           
-           # 计算第二个正交向量
-           ortho2 = position_direction.cross(ortho1).normalize()
-           
-           # 在局部坐标系中计算随机方向
-           new_direction = (
-               position_direction * math.cos(phi) +
-               ortho1 * (math.sin(phi) * math.cos(theta)) +
-               ortho2 * (math.sin(phi) * math.sin(theta))
-           )
-           
-           # 确保方向指向内部（与位置向量相反）
-           if new_direction.dot(position_direction) > 0:
-               new_direction = new_direction * -1
-        
-        # 应用速度减速
-        new_velocity = new_direction * (current_speed * 0.6)
-
-        # 计算新位置
-        new_position = point.position + new_velocity * dt
+        px, py, pz = point.position_array.tolist()
+        vx, vy, vz = point.velocity_array.tolist()
+        nx, ny, nz, nvx, nvy, nvz = _kernels.prismic_reflect(px, py, pz, vx, vy, vz, self.reflection_angle, *self._draw(), dt)
+        return Vector3D(nx, ny, nz), Vector3D(nvx, nvy, nvz)
+    
+    def handle_collision_batch(self, positions: np.ndarray, velocities: np.ndarray, dt: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量处理虹光回音壁边际之诗
         
-        return new_position, new_velocity
\ No newline at end of file
+        Args:
+            positions: 星翎坐标数组 (N, 3)
+            velocities: 星翎速度数组 (N, 3)
+            dt: 时间步长
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (新坐标, 新速度)
+        """
+        return _kernels.prismic_reflect_batch(positions, velocities, self.reflection_angle, *self._draw_batch(len(positions)), dt)
+    
+    def _specular_angles(self) -> Tuple[float, float, float, float]:
+        """镜面反射无需随机角度"""
+        return _SPECULAR_ANGLES
+    
+    def _diffuse_angles(self) -> Tuple[float, float, float, float]:
+        """漫反射：在指定角度范围内随机反射"""
+        return self.draw_angle(self.reflection_angle_range)
+    
+    def _specular_angles_batch(self, n: int) -> Tuple[np.ndarray, ...]:
+        """批量镜面反射，角度全为0"""
+        zeros = np.zeros(n)
+        return zeros, zeros, zeros, zeros
+    
+    def _diffuse_angles_batch(self, n: int) -> Tuple[np.ndarray, ...]:
+        """批量漫反射，见_diffuse_angles"""
+        return self.draw_angles(n, self.reflection_angle_range)
\ No newline at end of file
@@ -1,19 +1,28 @@
+import logging
 import math
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+import numpy as np
 from ..models.vector3d import Vector3D
 from ..models.stardust_core import StardustCore
 from ..models.celestial_plume import CelestialPlume
+from .barnes_hut import BarnesHutTree
+from . import _gravity_kernels
+
+logger = logging.getLogger(__name__)
 
 class GravityLoom:
     """星引织网：根据光速竖琴、引力涟漪距离、星律等条件，计算星核与星翎在时光步长中的引力共舞"""
     GRAVITY_CONSTANT: float = 0.1  # 引力常数 (N·m²/kg²)
     STARDUST_LIGHT_SPEED = 299792458.0  # 光速 (m/s)
     GRAVITY_FORCE_MIN_DISTANCE: float = 1e-3
+    BARNES_HUT_THETA: float = 0.5  # Barnes–Hut张角阈值
+    BARNES_HUT_MIN_SOURCES = 32  # 引力源少于该数时两两精确求和更快
     
     def __init__(self, gravity_constant: float = GRAVITY_CONSTANT, speed_of_light: float = STARDUST_LIGHT_SPEED, gravity_force_min_distance: float = GRAVITY_FORCE_MIN_DISTANCE,
                  enable_perturbations=True,
                  enable_relativistic_corrections=False,
-                 integration_method="rk4"):
+                 integration_method="rk4",
+                 barnes_hut_theta: float = BARNES_HUT_THETA):
         """
         初始化引力模块
         
@@ -23,7 +32,8 @@ class GravityLoom:
             gravity_force_min_distance: 引力作用最小距离
             enable_perturbations: 是否启用引力扰动
             enable_relativistic_corrections: 是否启用相对论修正
-            integration_method: 数值积分方法 ("euler", "rk2", "rk4")
+            integration_method: 数值积分方法 ("euler", "rk2", "rk4", "verlet")
+            barnes_hut_theta: Barnes–Hut张角阈值，为0时扰动引力始终两两精确求和
         """
         if gravity_constant <= 0:
             self._gravity_constant = GravityLoom.GRAVITY_CONSTANT
@@ -41,6 +51,7 @@ class GravityLoom:
         self._enable_perturbations = enable_perturbations
         self._enable_relativistic_corrections = enable_relativistic_corrections
         self._integration_method = integration_method
+        self._barnes_hut_theta = barnes_hut_theta
         # 根据项目参数调整物理效应的强度
         self._perturbation_scale = 1.0  # 扰动效应缩放因子
     
@@ -59,6 +70,9 @@ class GravityLoom:
         """获取引力作用最小距离"""
         return self._gravity_force_min_distance
     
+    barnes_hut_theta = property(lambda self: self._barnes_hut_theta, doc="获取Barnes–Hut张角阈值")
+    integration_method = property(lambda self: self._integration_method, doc="获取数值积分方法")
+    
     def calculate_oort_cloud_radius(self, central_mass: float = 88500):
         """
         计算奥尔特云半径，用于生成世界的边界大小。
@@ -131,25 +145,78 @@ class GravityLoom:
         返回:
             Vector3D: 作用在星翎上的引力向量
         """
-        # 从 星核 到 星翎 的位移矢量
-        r_vec = plume.position - stellar.position
-        distance = r_vec.magnitude()
-        
-        if distance < self.gravity_force_min_distance:
-            return Vector3D(0, 0, 0)
-        
-        # 基本牛顿引力
-        force_magnitude = (self.gravity_constant * stellar.mass * plume.mass) / (distance**2)
+        # 从 星核 到 星翎 的位移矢量，分量直接以浮点计算
+        plume_position = plume.position
+        stellar_position = stellar.position
+        rx = plume_position.x - stellar_position.x
+        ry = plume_position.y - stellar_position.y
+        rz = plume_position.z - stellar_position.z
+        d2 = rx * rx + ry * ry + rz * rz
+        min_distance = self._gravity_force_min_distance
+        if d2 < min_distance * min_distance:
+            return Vector3D.ORIGIN
+        
+        # 一次开方得到1/r，之后只做乘法：F = G·M·m/r²，方向 r_vec/r
+        G = self._gravity_constant
+        stellar_mass = stellar.mass
+        inv_r = 1.0 / math.sqrt(d2)
+        force_magnitude = G * stellar_mass * plume.mass * inv_r * inv_r
         
         # 相对论修正（后牛顿近似）
         if self._enable_relativistic_corrections:
-            # 简化的相对论修正因子
-            v_squared = 0  # 这里需要速度信息，暂时简化处理
-            relativistic_factor = 1 + (3 * self.gravity_constant * stellar.mass) / (distance * self.speed_of_light**2) - v_squared / self.speed_of_light**2
-            force_magnitude *= relativistic_factor
+            # 简化的相对论修正因子，速度项暂时简化为0
+            c = self._speed_of_light
+            force_magnitude *= 1 + 3 * G * stellar_mass * inv_r / (c * c)
         
         # 引力方向是从星翎指向星核
-        return r_vec.normalize() * (-force_magnitude)
+        scale = -force_magnitude * inv_r
+        return Vector3D(rx * scale, ry * scale, rz * scale)
+    
+    def source_arrays(self, gravity_sources: List[StardustCore]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        将引力源整理为连续的坐标与质量数组；同属一个星核结构数组时直接按行号取出
+        
+        参数:
+            gravity_sources: 引力源列表
+            
+        返回:
+            Tuple[np.ndarray, np.ndarray]: (坐标数组 (N, 3), 质量数组 (N,))
+        """
+        if gravity_sources:
+            soa = getattr(gravity_sources[0], "soa", None)
+            if soa is not None and all(getattr(s, "soa", None) is soa for s in gravity_sources):
+                rows = np.fromiter((s.soa_index for s in gravity_sources), dtype=np.intp, count=len(gravity_sources))
+                return soa.positions[rows], soa.masses[rows]
+        positions = np.array([(p.x, p.y, p.z) for p in (s.position for s in gravity_sources)], dtype=np.float64).reshape(-1, 3)
+        masses = np.array([s.mass for s in gravity_sources], dtype=np.float64)
+        return positions, masses
+    
+    def gravity_force_vectorized(self, point_position: np.ndarray, point_mass: float,
+                                 source_positions: np.ndarray, source_masses: np.ndarray) -> np.ndarray:
+        """
+        一次向量化计算所有引力源对星翎的基本引力之和，逐项与calculate_gravity_force一致
+        
+        参数:
+            point_position: 星翎坐标 (3,)
+            point_mass: 星翎质量
+            source_positions: 引力源坐标数组 (N, 3)
+            source_masses: 引力源质量数组 (N,)
+            
+        返回:
+            np.ndarray: 合力 (3,)
+        """
+        r_vec = point_position - source_positions
+        d2 = r_vec[:, 0] * r_vec[:, 0] + r_vec[:, 1] * r_vec[:, 1] + r_vec[:, 2] * r_vec[:, 2]
+        G = self._gravity_constant
+        min_distance = self._gravity_force_min_distance
+        too_close = d2 < min_distance * min_distance
+        inv_r = 1.0 / np.sqrt(np.where(too_close, 1.0, d2))  # 占位避免除零，对应项随后置零
+        force_magnitude = G * source_masses * point_mass * inv_r * inv_r
+        if self._enable_relativistic_corrections:
+            c = self._speed_of_light
+            force_magnitude *= 1 + 3 * G * source_masses * inv_r / (c * c)
+        scale = np.where(too_close, 0.0, -force_magnitude * inv_r)
+        return (r_vec * scale[:, None]).sum(axis=0)
     
     def calculate_perturbation_force(self, primary: StardustCore,
                                    plume: StardustCore,
@@ -166,69 +233,220 @@ class GravityLoom:
             Vector3D: 作用在星翎上的扰动引力向量
         """
         if not self._enable_perturbations:
-            return Vector3D(0, 0, 0)
-            
-        try:
-            # 计算扰动星核对星翎的直接引力
-            direct_force = self.calculate_gravity_force(perturber, plume)
-            if direct_force is None:
-                return Vector3D(0, 0, 0)
-            
-            # 计算扰动星核对主星核的扰动引力
-            primary_force = self.calculate_gravity_force(perturber, primary)
-            if primary_force is None:
-                return Vector3D(0, 0, 0)
-            
-            # 安全计算质量比
-            mass_ratio = 0.0
-            if primary.mass > 1e-10:  # 避免除零和小数精度问题
-                mass_ratio = plume.mass / primary.mass
+            return Vector3D.ORIGIN
             
-            # 计算扰动力，确保数值稳定
-            scaled_primary_force = primary_force * mass_ratio
-            perturbation = direct_force - scaled_primary_force
+        # 计算扰动星核对星翎的直接引力
+        direct_force = self.calculate_gravity_force(perturber, plume)
+        
+        # 计算扰动星核对主星核的扰动引力
+        primary_force = self.calculate_gravity_force(perturber, primary)
+        
+        # 安全计算质量比
+        mass_ratio = 0.0
+        if primary.mass > 1e-10:  # 避免除零和小数精度问题
+            mass_ratio = plume.mass / primary.mass
+        
+        # 计算扰动力，确保数值稳定
+        scaled_primary_force = primary_force * mass_ratio
+        perturbation = direct_force - scaled_primary_force
+        
+        # 应用扰动效应缩放因子，确保在小质量系统中合理但可见
+        return perturbation * self._perturbation_scale
+    
+    def build_source_tree(self, gravity_sources: List[StardustCore],
+                          arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Optional[BarnesHutTree]:
+        """
+        为扰动引力计算建立引力源的Barnes–Hut八叉树
+        
+        参数:
+            gravity_sources: 引力源列表
+            arrays: 引力源的(坐标数组, 质量数组)，即source_arrays的结果；给出时不再逐个读取引力源属性
             
-            # 应用扰动效应缩放因子，确保在小质量系统中合理但可见
-            perturbation = perturbation * self._perturbation_scale
+        返回:
+            Optional[BarnesHutTree]: 八叉树；张角阈值为0、引力源过少、未启用扰动或启用相对论修正时返回None，
+            此时扰动引力按两两精确求和
+        """
+        if (self._barnes_hut_theta <= 0 or not self._enable_perturbations
+                or self._enable_relativistic_corrections
+                or len(gravity_sources) < self.BARNES_HUT_MIN_SOURCES):
+            return None
+        positions, masses = arrays if arrays is not None else self.source_arrays(gravity_sources)
+        return BarnesHutTree(positions, masses)
+    
+    def calculate_total_acceleration_bh(self, point: CelestialPlume, gravity_sources: List[StardustCore],
+                                        tree: BarnesHutTree, theta: float = BARNES_HUT_THETA) -> Vector3D:
+        """
+        借助Barnes–Hut八叉树计算总加速度
+        
+        两两扰动项 Σ_{i≠j}[F_j(星翎) - F_j(星核i)·m/M_i] 可拆为
+        (N-1)·ΣF_j(星翎) - m·Σ_i a_i，其中a_i为星核i受其余星核的引力加速度，
+        后者对每个星核遍历一次八叉树即可求得
+        
+        参数:
+            point: 要计算加速度的点
+            gravity_sources: 引力源列表，须与建树时顺序一致
+            tree: build_source_tree建成的八叉树
+            theta: 张角阈值
             
-            return perturbation
+        返回:
+            Vector3D: 总加速度向量
+        """
+        return self._acceleration_at_bh(point.position, point.mass, gravity_sources, tree, theta)
+    
+    def _acceleration_at_bh(self, position: Vector3D, mass: float, gravity_sources: List[StardustCore],
+                            tree: BarnesHutTree, theta: float) -> Vector3D:
+        """calculate_total_acceleration_bh的主体，直接以坐标与质量计算"""
+        return Vector3D(*self._acceleration_xyz_bh(position.x, position.y, position.z, mass,
+                                                   len(gravity_sources), tree, theta))
+    
+    def _acceleration_xyz_bh(self, px: float, py: float, pz: float, mass: float, n: int,
+                             tree: BarnesHutTree, theta: float) -> Tuple[float, float, float]:
+        """
+        以浮点分量计算八叉树路径下的总加速度，不构造向量对象
+        
+        参数:
+            px, py, pz: 受力点坐标
+            mass: 受力点质量
+            n: 引力源数量
+            tree: build_source_tree建成的八叉树
+            theta: 张角阈值
             
-        except Exception as e:
-            import logging
-            logging.error(f"计算扰动引力时出错: {str(e)}")
-            return Vector3D(0, 0, 0)
+        返回:
+            Tuple[float, float, float]: 加速度 (ax, ay, az)
+        """
+        fx, fy, fz = self.gravity_force_vectorized(np.array((px, py, pz)), mass, tree.positions, tree.masses).tolist()
+        
+        # Σ_i a_i与星翎无关，同一棵树在RK各阶段只遍历一次；质量保护与calculate_perturbation_force一致
+        sx, sy, sz = tree.mutual_acceleration_sum(self._gravity_constant, theta, self._gravity_force_min_distance, min_mass=1e-10)
+        
+        scale = self._perturbation_scale
+        k = (n - 1) * scale
+        return ((fx + k * fx - scale * mass * sx) / mass,
+                (fy + k * fy - scale * mass * sy) / mass,
+                (fz + k * fz - scale * mass * sz) / mass)
     
-    def calculate_total_acceleration(self, point: CelestialPlume, gravity_sources: List[StardustCore]) -> Vector3D:
+    def calculate_total_acceleration(self, point: CelestialPlume, gravity_sources: List[StardustCore],
+                                     tree: Optional[BarnesHutTree] = None,
+                                     arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Vector3D:
         """
         计算一个点受到所有引力源的总加速度，包含所有高级效应
         
         参数:
             point: 要计算加速度的点
             gravity_sources: 引力源列表
+            tree: 引力源的Barnes–Hut八叉树，给出时扰动引力经八叉树求和
+            arrays: 引力源的(坐标数组, 质量数组)，即source_arrays的结果；给出时不再逐个读取引力源属性
             
         返回:
             Vector3D: 总加速度向量
         """
-        total_force = Vector3D(0, 0, 0)
+        return self.acceleration_at(point.position, point.mass, gravity_sources, tree, arrays)
+    
+    def acceleration_at(self, position: Vector3D, mass: float, gravity_sources: List[StardustCore],
+                        tree: Optional[BarnesHutTree] = None,
+                        arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Vector3D:
+        """
+        计算位于position、质量为mass的点受到的总加速度，无需构造星翎对象
         
-        # 计算基本引力
-        for source in gravity_sources:
-            force = self.calculate_gravity_force(source, point)
-            total_force += force
+        参数:
+            position: 受力点坐标
+            mass: 受力点质量
+            gravity_sources: 引力源列表
+            tree: 引力源的Barnes–Hut八叉树，给出时扰动引力经八叉树求和
+            arrays: 引力源的(坐标数组, 质量数组)，即source_arrays的结果；给出时不再逐个读取引力源属性
+            
+        返回:
+            Vector3D: 总加速度向量
+        """
+        if tree is not None:
+            return self._acceleration_at_bh(position, mass, gravity_sources, tree, self._barnes_hut_theta)
+        
+        # 基本引力与扰动引力在数值内核中一并求和
+        # 对所有有序星核对(i, j)求和的扰动 F_j(星翎) - F_j(星核i)·m/M_i 可化为闭式
+        # (N-1)·ΣF_j(星翎) - m·Σ_i a_i，无需逐对调用calculate_perturbation_force
+        source_positions, source_masses = arrays if arrays is not None else self.source_arrays(gravity_sources)
+        G = self._gravity_constant
+        min_distance = self._gravity_force_min_distance
+        c = self._speed_of_light
+        relativistic = self._enable_relativistic_corrections
+        sx, sy, sz = _gravity_kernels.mutual_acceleration_sum(source_positions, source_masses, G, min_distance, c, relativistic)
+        return Vector3D(*_gravity_kernels.total_acceleration(
+            position.x, position.y, position.z, float(mass), source_positions, source_masses, sx, sy, sz,
+            G, min_distance, c, relativistic, self._enable_perturbations, self._perturbation_scale))
+    
+    def accel_batch(self, positions: np.ndarray, gravity_sources: List[StardustCore],
+                    arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> np.ndarray:
+        """
+        一次求P个星翎各自受到的总加速度，结果与逐个调用acceleration_at一致；
+        引力与扰动引力都正比于星翎质量，加速度与之无关，因此无需星翎质量
         
-        # 计算扰动引力（三体或多体效应）
-        if self._enable_perturbations and len(gravity_sources) >= 2:
-            for i, primary_source in enumerate(gravity_sources):
-                for j, perturber_source in enumerate(gravity_sources):
-                    if i != j:  # 确保不是同一个引力源
-                        perturbation_force = self.calculate_perturbation_force(primary_source, point, perturber_source)
-                        total_force += perturbation_force
+        P×N的距离平方矩阵按 |a-b|² = |a|² + |b|² - 2a·b 由一次矩阵乘法(BLAS)得到，
+        各引力源的合力再以einsum归约；坐标远大于间距时该展开有舍入误差，适合P较大的批量场景
         
-        # F = ma, 所以 a = F/m
-        return total_force / point.mass
+        参数:
+            positions: 星翎坐标数组 (P, 3)
+            gravity_sources: 引力源列表
+            arrays: 引力源的(坐标数组, 质量数组)，即source_arrays的结果；给出时不再逐个读取引力源属性
+            
+        返回:
+            np.ndarray: 加速度数组 (P, 3)
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        source_positions, source_masses = arrays if arrays is not None else self.source_arrays(gravity_sources)
+        n = len(source_masses)
+        if n == 0:
+            return np.zeros_like(positions)
+        G = self._gravity_constant
+        min_distance = self._gravity_force_min_distance
+        
+        d2 = (np.einsum('ij,ij->i', positions, positions)[:, None]
+              + np.einsum('ij,ij->i', source_positions, source_positions)[None, :]
+              - 2.0 * (positions @ source_positions.T))
+        np.maximum(d2, 0.0, out=d2)
+        too_close = d2 < min_distance * min_distance
+        inv_r = 1.0 / np.sqrt(np.where(too_close, 1.0, d2))  # 占位避免除零，对应项随后置零
+        weight = G * source_masses[None, :] * inv_r * inv_r * inv_r
+        if self._enable_relativistic_corrections:
+            weight *= 1 + 3 * G * source_masses[None, :] * inv_r / (self._speed_of_light * self._speed_of_light)
+        weight[too_close] = 0.0
+        
+        # Σ_j w_pj·(r_j - r_p) = W·R_src - (Σ_j w_pj)·r_p，同样归结为一次矩阵乘法
+        acceleration = weight @ source_positions - weight.sum(axis=1)[:, None] * positions
+        if self._enable_perturbations and n >= 2:
+            sx, sy, sz = _gravity_kernels.mutual_acceleration_sum(
+                source_positions, source_masses, G, min_distance, self._speed_of_light,
+                self._enable_relativistic_corrections)
+            scale = self._perturbation_scale
+            acceleration += (n - 1) * scale * acceleration - scale * np.array((sx, sy, sz))
+        return acceleration
+    
+    def _integrate_with_kernel(self, kernel, point: CelestialPlume, gravity_sources: List[StardustCore],
+                               time_step: float, arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Tuple[Vector3D, Vector3D]:
+        """
+        以数值内核完成一步积分，仅在进出内核时与向量互相转换
+        
+        参数:
+            kernel: _gravity_kernels中的单步积分内核
+            point: 要积分的点
+            gravity_sources: 引力源列表
+            time_step: 时间步长
+            arrays: 引力源的(坐标数组, 质量数组)，即source_arrays的结果；给出时不再逐个读取引力源属性
+            
+        返回:
+            Tuple[Vector3D, Vector3D]: (新位置, 新速度)
+        """
+        source_positions, source_masses = arrays if arrays is not None else self.source_arrays(gravity_sources)
+        px, py, pz = point.position_array.tolist()
+        vx, vy, vz = point.velocity_array.tolist()
+        nx, ny, nz, nvx, nvy, nvz = kernel(
+            px, py, pz, vx, vy, vz, float(point.mass), source_positions, source_masses,
+            self._gravity_constant, float(time_step), self._gravity_force_min_distance, self._speed_of_light,
+            self._enable_relativistic_corrections, self._enable_perturbations, self._perturbation_scale)
+        return Vector3D(nx, ny, nz), Vector3D(nvx, nvy, nvz)
     
     def runge_kutta_4_step(self, point: CelestialPlume, gravity_sources: List[StardustCore],
-                         time_step: float) -> Tuple[Vector3D, Vector3D]:
+                         time_step: float, tree: Optional[BarnesHutTree] = None,
+                         arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Tuple[Vector3D, Vector3D]:
         """
         使用四阶Runge-Kutta方法进行一步积分
         
@@ -236,42 +454,52 @@ class GravityLoom:
             point: 要积分的点
             gravity_sources: 引力源列表
             time_step: 时间步长
+            tree: 引力源的Barnes–Hut八叉树，可选
+            arrays: 引力源的(坐标数组, 质量数组)，即source_arrays的结果；给出时不再逐个读取引力源属性
             
         返回:
             Tuple[Vector3D, Vector3D]: (新位置, 新速度)
         """
-        # RK4方法需要计算四个中间状态
+        if tree is None:
+            return self._integrate_with_kernel(_gravity_kernels.rk4_step, point, gravity_sources, time_step, arrays)
+        
+        # RK4方法需要计算四个中间状态，中间状态全部以浮点分量传递，只在返回时构造向量
+        mass = point.mass
+        n = len(gravity_sources)
+        theta = self._barnes_hut_theta
+        acceleration_xyz = self._acceleration_xyz_bh
+        half = time_step / 2
         # k1
-        a1 = self.calculate_total_acceleration(point, gravity_sources)
-        v1 = point.velocity
-        r1 = point.position
+        px, py, pz = point.position_array.tolist()
+        vx, vy, vz = point.velocity_array.tolist()
+        a1x, a1y, a1z = acceleration_xyz(px, py, pz, mass, n, tree, theta)
         
         # k2
-        temp_point = CelestialPlume(r1 + v1 * (time_step/2), v1 + a1 * (time_step/2), mass=point.mass)
-        a2 = self.calculate_total_acceleration(temp_point, gravity_sources)
-        v2 = temp_point.velocity
-        r2 = temp_point.position
+        v2x, v2y, v2z = vx + a1x * half, vy + a1y * half, vz + a1z * half
+        a2x, a2y, a2z = acceleration_xyz(px + vx * half, py + vy * half, pz + vz * half, mass, n, tree, theta)
         
         # k3
-        temp_point = CelestialPlume(r1 + v2 * (time_step/2), v1 + a2 * (time_step/2), mass=point.mass)
-        a3 = self.calculate_total_acceleration(temp_point, gravity_sources)
-        v3 = temp_point.velocity
-        r3 = temp_point.position
+        v3x, v3y, v3z = vx + a2x * half, vy + a2y * half, vz + a2z * half
+        a3x, a3y, a3z = acceleration_xyz(px + v2x * half, py + v2y * half, pz + v2z * half, mass, n, tree, theta)
         
         # k4
-        temp_point = CelestialPlume(r1 + v3 * time_step, v1 + a3 * time_step, mass=point.mass)
-        a4 = self.calculate_total_acceleration(temp_point, gravity_sources)
-        v4 = temp_point.velocity
-        r4 = temp_point.position
+        v4x, v4y, v4z = vx + a3x * time_step, vy + a3y * time_step, vz + a3z * time_step
+        a4x, a4y, a4z = acceleration_xyz(px + v3x * time_step, py + v3y * time_step, pz + v3z * time_step, mass, n, tree, theta)
         
         # 计算新位置和新速度
-        new_position = r1 + (v1 + v2*2 + v3*2 + v4) * (time_step/6)
-        new_velocity = v1 + (a1 + a2*2 + a3*2 + a4) * (time_step/6)
+        w = time_step / 6
+        new_position = Vector3D(px + (vx + 2 * v2x + 2 * v3x + v4x) * w,
+                                py + (vy + 2 * v2y + 2 * v3y + v4y) * w,
+                                pz + (vz + 2 * v2z + 2 * v3z + v4z) * w)
+        new_velocity = Vector3D(vx + (a1x + 2 * a2x + 2 * a3x + a4x) * w,
+                                vy + (a1y + 2 * a2y + 2 * a3y + a4y) * w,
+                                vz + (a1z + 2 * a2z + 2 * a3z + a4z) * w)
         
         return new_position, new_velocity
     
     def runge_kutta_2_step(self, point: CelestialPlume, gravity_sources: List[StardustCore],
-                         time_step: float) -> Tuple[Vector3D, Vector3D]:
+                         time_step: float, tree: Optional[BarnesHutTree] = None,
+                         arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Tuple[Vector3D, Vector3D]:
         """
         使用二阶Runge-Kutta方法进行一步积分
         
@@ -279,29 +507,39 @@ class GravityLoom:
             point: 要积分的点
             gravity_sources: 引力源列表
             time_step: 时间步长
+            tree: 引力源的Barnes–Hut八叉树，可选
+            arrays: 引力源的(坐标数组, 质量数组)，即source_arrays的结果；给出时不再逐个读取引力源属性
             
         返回:
             Tuple[Vector3D, Vector3D]: (新位置, 新速度)
         """
-        # RK2方法（中点法）
+        if tree is None:
+            return self._integrate_with_kernel(_gravity_kernels.rk2_step, point, gravity_sources, time_step, arrays)
+        
+        # RK2方法（中点法），中间状态以浮点分量传递
+        mass = point.mass
+        n = len(gravity_sources)
+        theta = self._barnes_hut_theta
+        acceleration_xyz = self._acceleration_xyz_bh
+        half = time_step / 2
         # k1
-        a1 = self.calculate_total_acceleration(point, gravity_sources)
-        v1 = point.velocity
-        r1 = point.position
+        px, py, pz = point.position_array.tolist()
+        vx, vy, vz = point.velocity_array.tolist()
+        a1x, a1y, a1z = acceleration_xyz(px, py, pz, mass, n, tree, theta)
         
         # k2
-        temp_point = CelestialPlume(r1 + v1 * (time_step/2), v1 + a1 * (time_step/2), mass=point.mass)
-        a2 = self.calculate_total_acceleration(temp_point, gravity_sources)
-        v2 = temp_point.velocity
+        v2x, v2y, v2z = vx + a1x * half, vy + a1y * half, vz + a1z * half
+        a2x, a2y, a2z = acceleration_xyz(px + vx * half, py + vy * half, pz + vz * half, mass, n, tree, theta)
         
         # 计算新位置和新速度
-        new_position = r1 + v2 * time_step
-        new_velocity = v1 + a2 * time_step
+        new_position = Vector3D(px + v2x * time_step, py + v2y * time_step, pz + v2z * time_step)
+        new_velocity = Vector3D(vx + a2x * time_step, vy + a2y * time_step, vz + a2z * time_step)
         
         return new_position, new_velocity
     
     def euler_step(self, point: CelestialPlume, gravity_sources: List[StardustCore],
-                 time_step: float) -> Tuple[Vector3D, Vector3D]:
+                 time_step: float, tree: Optional[BarnesHutTree] = None,
+                 arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Tuple[Vector3D, Vector3D]:
         """
         使用欧拉方法进行一步积分
         
@@ -310,12 +548,17 @@ class GravityLoom:
             gravity_sources: 引力源列表
             G: 引力常数
             time_step: 时间步长
+            tree: 引力源的Barnes–Hut八叉树，可选
+            arrays: 引力源的(坐标数组, 质量数组)，即source_arrays的结果；给出时不再逐个读取引力源属性
             
         返回:
             Tuple[Vector3D, Vector3D]: (新位置, 新速度)
         """
+        if tree is None:
+            return self._integrate_with_kernel(_gravity_kernels.euler_step, point, gravity_sources, time_step, arrays)
+        
         # 计算加速度
-        acceleration = self.calculate_total_acceleration(point, gravity_sources)
+        acceleration = self.calculate_total_acceleration(point, gravity_sources, tree)
         
         # 更新速度和位置
         new_velocity = point.velocity + acceleration * time_step
@@ -323,8 +566,53 @@ class GravityLoom:
         
         return new_position, new_velocity
     
+    def velocity_verlet_step(self, point: CelestialPlume, gravity_sources: List[StardustCore],
+                             time_step: float, tree: Optional[BarnesHutTree] = None,
+                             arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Tuple[Vector3D, Vector3D]:
+        """
+        使用速度Verlet方法进行一步积分：辛积分器，长时间模拟中能量不漂移，每步只需一次加速度计算
+        
+        new_pos = pos + vel·dt + a_old·dt²/2，new_vel = vel + (a_old + a_new)·dt/2；
+        a_new缓存在星翎上，下一步星翎坐标未被改动时作为a_old直接复用
+        
+        参数:
+            point: 要积分的点
+            gravity_sources: 引力源列表
+            time_step: 时间步长
+            tree: 引力源的Barnes–Hut八叉树，可选
+            arrays: 引力源的(坐标数组, 质量数组)，即source_arrays的结果；给出时不再逐个读取引力源属性
+            
+        返回:
+            Tuple[Vector3D, Vector3D]: (新位置, 新速度)
+        """
+        a_old = point.cached_acceleration()
+        if tree is None:
+            if a_old is None:
+                acceleration = self.acceleration_at(point.position, point.mass, gravity_sources, arrays=arrays)
+                a_old = (acceleration.x, acceleration.y, acceleration.z)
+            source_positions, source_masses = arrays if arrays is not None else self.source_arrays(gravity_sources)
+            px, py, pz = point.position_array.tolist()
+            vx, vy, vz = point.velocity_array.tolist()
+            nx, ny, nz, nvx, nvy, nvz, nax, nay, naz = _gravity_kernels.verlet_step(
+                px, py, pz, vx, vy, vz, *a_old, float(point.mass), source_positions, source_masses,
+                self._gravity_constant, float(time_step), self._gravity_force_min_distance, self._speed_of_light,
+                self._enable_relativistic_corrections, self._enable_perturbations, self._perturbation_scale)
+            point.cache_acceleration((nx, ny, nz), (nax, nay, naz))
+            return Vector3D(nx, ny, nz), Vector3D(nvx, nvy, nvz)
+        
+        position = point.position
+        velocity = point.velocity
+        acceleration = Vector3D(*a_old) if a_old is not None else self.acceleration_at(position, point.mass, gravity_sources, tree)
+        new_position = position + (velocity + acceleration * (time_step / 2)) * time_step
+        new_acceleration = self.acceleration_at(new_position, point.mass, gravity_sources, tree)
+        new_velocity = velocity + (acceleration + new_acceleration) * (time_step / 2)
+        point.cache_acceleration((new_position.x, new_position.y, new_position.z),
+                                 (new_acceleration.x, new_acceleration.y, new_acceleration.z))
+        return new_position, new_velocity
+    
     def integrate_step(self, point: CelestialPlume, gravity_sources: List[StardustCore],
-                      time_step: float) -> Tuple[Vector3D, Vector3D]:
+                      time_step: float, tree: Optional[BarnesHutTree] = None,
+                      arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Tuple[Vector3D, Vector3D]:
         """
         根据选择的积分方法进行一步积分
         
@@ -332,20 +620,82 @@ class GravityLoom:
             point: 要积分的点
             gravity_sources: 引力源列表
             time_step: 时间步长
+            tree: 引力源的Barnes–Hut八叉树，可选
+            arrays: 引力源的(坐标数组, 质量数组)，即source_arrays的结果；给出时不再逐个读取引力源属性
             
         返回:
             Tuple[Vector3D, Vector3D]: (新位置, 新速度)
         """
         if self._integration_method == "rk4":
-            return self.runge_kutta_4_step(point, gravity_sources, time_step)
+            return self.runge_kutta_4_step(point, gravity_sources, time_step, tree, arrays)
         elif self._integration_method == "rk2":
-            return self.runge_kutta_2_step(point, gravity_sources, time_step)
+            return self.runge_kutta_2_step(point, gravity_sources, time_step, tree, arrays)
+        elif self._integration_method == "verlet":
+            return self.velocity_verlet_step(point, gravity_sources, time_step, tree, arrays)
         else:  # 默认使用欧拉方法
-            return self.euler_step(point, gravity_sources, time_step)
+            return self.euler_step(point, gravity_sources, time_step, tree, arrays)
+    
+    def select_and_integrate(self, point: CelestialPlume, positions: np.ndarray, masses: np.ndarray,
+                             candidates: np.ndarray, time_step: float, influence_threshold: float = 1e-6,
+                             max_sources: int = 10) -> Tuple[np.ndarray, Vector3D, Vector3D]:
+        """
+        在一个数值内核中完成引力源筛选（同filter_gravity_sources_by_influence）与单步积分（同integrate_step）
+        
+        不建八叉树，也不支持依赖星翎缓存的"verlet"，调用方需自行判断适用性
+        
+        参数:
+            point: 要积分的点
+            positions: 引力源坐标数组 (N, 3)，通常为星核结构数组
+            masses: 引力源质量数组 (N,)
+            candidates: 参与筛选的行号数组 (M,)
+            time_step: 时间步长
+            influence_threshold: 影响力阈值
+            max_sources: 最大保留的引力源数量
+            
+        返回:
+            Tuple[np.ndarray, Vector3D, Vector3D]: (入选者在candidates中的位置, 新位置, 新速度)
+        """
+        method = {"rk4": _gravity_kernels.RK4, "rk2": _gravity_kernels.RK2}.get(self._integration_method, _gravity_kernels.EULER)
+        px, py, pz = point.position_array.tolist()
+        vx, vy, vz = point.velocity_array.tolist()
+        chosen, (nx, ny, nz, nvx, nvy, nvz) = _gravity_kernels.select_and_integrate(
+            method, px, py, pz, vx, vy, vz, float(point.mass), positions, masses,
+            np.ascontiguousarray(candidates, dtype=np.int64), float(influence_threshold), int(max_sources),
+            self._gravity_constant, float(time_step), self._gravity_force_min_distance, self._speed_of_light,
+            self._enable_relativistic_corrections, self._enable_perturbations, self._perturbation_scale)
+        return chosen, Vector3D(nx, ny, nz), Vector3D(nvx, nvy, nvz)
+    
+    def integrate_batch(self, positions: np.ndarray, velocities: np.ndarray, masses: np.ndarray,
+                        gravity_sources: List[StardustCore], time_step: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        以选定的积分方法一次推进多个星翎，所有星翎共用同一组引力源
+        
+        参数:
+            positions: 星翎坐标数组 (P, 3)
+            velocities: 星翎速度数组 (P, 3)
+            masses: 星翎质量数组 (P,)
+            gravity_sources: 引力源列表
+            time_step: 时间步长
+            
+        返回:
+            Tuple[np.ndarray, np.ndarray]: (新坐标 (P, 3), 新速度 (P, 3))
+        """
+        method = {"rk4": _gravity_kernels.RK4, "rk2": _gravity_kernels.RK2,
+                  "verlet": _gravity_kernels.VERLET}.get(self._integration_method, _gravity_kernels.EULER)
+        source_positions, source_masses = self.source_arrays(gravity_sources)
+        return _gravity_kernels.integrate_batch(
+            method,
+            np.ascontiguousarray(positions, dtype=np.float64).reshape(-1, 3),
+            np.ascontiguousarray(velocities, dtype=np.float64).reshape(-1, 3),
+            np.ascontiguousarray(masses, dtype=np.float64).reshape(-1),
+            source_positions, source_masses,
+            self._gravity_constant, float(time_step), self._gravity_force_min_distance, self._speed_of_light,
+            self._enable_relativistic_corrections, self._enable_perturbations, self._perturbation_scale)
     
     def filter_gravity_sources_by_influence(self, point: CelestialPlume, gravity_sources: List[StardustCore],
                                           influence_threshold: float = 1e-6,
-                                          max_sources: int = 10) -> List[StardustCore]:
+                                          max_sources: int = 10,
+                                          arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> List[StardustCore]:
         """
         根据影响力筛选引力源，只保留影响力最大的引力源
         
@@ -354,26 +704,27 @@ class GravityLoom:
             gravity_sources: 所有引力源列表
             influence_threshold: 影响力阈值，低于此值的引力源将被忽略
             max_sources: 最大保留的引力源数量
+            arrays: 引力源的(坐标数组, 质量数组)，即source_arrays的结果；给出时不再逐个读取引力源属性
             
         返回:
             List[StardustCore]: 筛选后的引力源列表
         """
-        # 计算每个引力源的影响力
-        source_influences = []
-        for source in gravity_sources:
-            distance = (point.position - source.position).magnitude()
-            if distance < 1e-10:  # 避免除零
-                continue
-                
-            # 影响力定义为 G*M/r^2
-            influence = (self.gravity_constant * source.mass) / (distance**2)
-            if influence >= influence_threshold:
-                source_influences.append((source, influence))
-        
-        # 按影响力降序排序
-        source_influences.sort(key=lambda x: x[1], reverse=True)
-        
-        # 只保留影响力最大的max_sources个引力源
-        filtered_sources = [item[0] for item in source_influences[:max_sources]]
-        
-        return filtered_sources
\ No newline at end of file
+        if not gravity_sources or max_sources <= 0:
+            return []
+        
+        # 以数组一次算出全部影响力 G*M/r^2，距离过近(避免除零)或低于阈值的引力源不参与筛选
+        source_positions, source_masses = arrays if arrays is not None else self.source_arrays(gravity_sources)
+        offset = source_positions - point.position_array
+        d2 = np.einsum('ij,ij->i', offset, offset)
+        valid = d2 >= 1e-20
+        influence = np.zeros(len(gravity_sources))
+        influence[valid] = self._gravity_constant * source_masses[valid] / d2[valid]
+        candidates = np.flatnonzero(valid & (influence >= influence_threshold))
+        
+        # 只取影响力最大的max_sources个：argpartition线性求出第K大的影响力，只对不低于它的引力源排序
+        if len(candidates) > max_sources:
+            kth = -np.partition(-influence[candidates], max_sources - 1)[max_sources - 1]
+            candidates = candidates[influence[candidates] >= kth]
+        # 按影响力降序，影响力相同时保持原顺序
+        candidates = candidates[np.lexsort((candidates, -influence[candidates]))][:max_sources]
+        return [gravity_sources[i] for i in candidates.tolist()]
\ No newline at end of file
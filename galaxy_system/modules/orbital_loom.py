@@ -1,15 +1,24 @@
-from typing import Dict, Any, List, Tuple
+from collections import deque
+from typing import Deque, Dict, Any, List, Optional, Tuple
 from ..models.stellar_pearl import StellarPearl
 from ..models.celestial_plume import CelestialPlume
 from ..models.vector3d import Vector3D
 from .gravity_loom import GravityLoom
 from .boundary.base import BoundaryAtrium
 import logging
+import math
+import numpy as np
+
+logger = logging.getLogger(__name__)
 
 class OrbitalLoom:
     """星轨织机：通过时光步长计算星引织网的扰动，编织星翎在月光坐标中的舞姿、速度羽衣、及星核共鸣状态"""
+    INFLUENCE_THRESHOLD = 1e-6  # 引力源影响力阈值，低于此值的星核不参与引力计算
+    MAX_SOURCES = 10  # 每步参与引力计算的引力源默认上限
     
-    def __init__(self, gravity_module: GravityLoom, boundary_effect: BoundaryAtrium, time_step: float):
+    def __init__(self, gravity_module: GravityLoom, boundary_effect: BoundaryAtrium, time_step: float,
+                 refilter_interval: int = 1, refilter_distance: float = float('inf'),
+                 history_size: int = 0, max_sources: int = MAX_SOURCES):
         """
         初始化运行模块
         
@@ -17,11 +26,23 @@ class OrbitalLoom:
             gravity_module: 引力模块
             boundary_effect: 边界效果
             time_step: 时间步长
+            refilter_interval: 每隔多少步重新筛选一次引力源，1表示每步筛选
+            refilter_distance: 星翎自上次筛选起移动超过该距离时提前重新筛选
+            history_size: 保留最近多少步的运动记录，0表示不记录
+            max_sources: 每步参与引力计算的引力源上限，达到引力模块的BARNES_HUT_MIN_SOURCES时扰动引力经八叉树求和
         """
         self.gravity_module = gravity_module
         self.boundary_effect = boundary_effect
         self.time_step = time_step
         self.capture_events: List[Dict[str, Any]] = []
+        self.refilter_interval = refilter_interval
+        self.max_sources = max_sources
+        self.refilter_distance = refilter_distance
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history_size)  # 定长环形缓冲，旧记录自动丢弃
+        # 步进间保留的筛选结果：(筛选后的引力源, 引力源数组, 八叉树)，星核失效或复苏时作废
+        self._last_filter_step: Optional[int] = None
+        self._last_filter_position: Optional[np.ndarray] = None
+        self._last_filtered: Optional[Tuple[List[StellarPearl], Tuple[np.ndarray, np.ndarray], Any]] = None
     
     def step(self, stellar_pearls: List[StellarPearl], celestial_plume: CelestialPlume, step: int) -> Dict[str, Any]:
         """
@@ -44,30 +65,35 @@ class OrbitalLoom:
         }
 
         is_captured = False
-        history = [] 
+        moved = False  # 积分器是否已直接给出星翎的新位置
+        debug = logger.isEnabledFor(logging.DEBUG)  # 关闭DEBUG时跳过f-string求值
         
         # 1. 计算当前最近的有效星核和它到星翎的距离
         # 注意：总是会有有效星核，因为已经处理了默认星核的情况
-        logging.debug(f"步进{step}: 开始计算最近星核...")
-        min_dist = float('inf')
+        if debug:
+            logger.debug("步进%d: 开始计算最近星核...", step)
+        min_d2 = float('inf')
         current_closest_anchor_obj = None 
         
         # 总是会有有效星核，因为我们已经处理了默认星核的情况
-        for stellar in stellar_pearls:
-            # if not stellar.perturbations:
-            #     continue
-            dist = (celestial_plume.position - stellar.position).magnitude()
-            if dist < min_dist:
-                min_dist = dist
-                current_closest_anchor_obj = stellar
+        # 对全部星核坐标一次求距离平方并取argmin，只对最近的星核开一次方
+        if stellar_pearls:
+            pearl_positions, _ = self.gravity_module.source_arrays(stellar_pearls)
+            offset = pearl_positions - celestial_plume.position_array
+            d2 = np.einsum('ij,ij->i', offset, offset)
+            closest = int(d2.argmin())
+            min_d2 = float(d2[closest])
+            current_closest_anchor_obj = stellar_pearls[closest]
+        # 捕获判定只比较距离平方，最近距离仅供日志输出，需要时才开方
         
         # ----------------------------------------
         # 边界碰撞处理 (优先级最高)
         # 当活动质点触碰边界时，会触发边界处理逻辑
         # 边界处理可能包括反射、传送等效果
-        logging.debug(f"步进{step}: 检查边界碰撞...")
+        if debug:
+            logger.debug("步进%d: 检查边界碰撞...", step)
         if self.boundary_effect.check_collision(celestial_plume):
-            logging.info(f"步进{step}: 触碰边界")
+            logger.info("步进%d: 触碰边界", step)
             is_captured = False  # 解除捕获状态
             # 使用边界处理器处理边界情况
             new_position, new_velocity = self.boundary_effect.handle_collision(celestial_plume, step)
@@ -81,90 +107,223 @@ class OrbitalLoom:
             })
             
             # 如果是warp事件，记录相关信息
-            logging.info(f"步进{step}: 边界处理，星翎已触碰了边界，位置发生变更")
+            logger.info("步进%d: 边界处理，星翎已触碰了边界，位置发生变更", step)
             
             # 确保填充positions数据
             result["positions"][id(celestial_plume)] = celestial_plume.position
             result["velocities"][id(celestial_plume)] = celestial_plume.velocity
             
-            logging.info(f"步进{step}[边界处理]: 位置={celestial_plume.position}, 速度={celestial_plume.velocity.magnitude():.1f}m/s, 最近星核: {current_closest_anchor_obj.name}({min_dist:.1f}m)")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("步进%d[边界处理]: 位置=%s, 速度=%.1fm/s, 最近星核: %s(%.1fm)", step, celestial_plume.position, celestial_plume.velocity.magnitude(), current_closest_anchor_obj.name, math.sqrt(min_d2))
             return result  # 返回当前结果
 
         # ----------------------------------------
         # 捕获逻辑 (仅当未触发边界碰撞时执行)
         # 当星翎与星核的距离小于该星核的理想同步轨道高度时，会被捕获
         # 被捕获的星核会暂时失效60个步进
-        logging.debug(f"步进{step}: 检查捕获条件...")
+        if debug:
+            logger.debug("步进%d: 检查捕获条件...", step)
         if not is_captured:
             # 检查是否满足捕获条件：星翎与星核的距离小于该星核的理想同步轨道高度
-            if min_dist < current_closest_anchor_obj.orbit_radius:
+            orbit_radius = current_closest_anchor_obj.orbit_radius
+            if min_d2 < orbit_radius * orbit_radius:
                 is_captured = True
                 # 无效化捕获星核
                 current_closest_anchor_obj.perturbations = False
                 current_closest_anchor_obj.revival_rounds = step
-                logging.info(f"!!! 步进 {step}: 星翎已触碰星核 {current_closest_anchor_obj.name}  (距离 {min_dist:.5f}m < 轨道半径 {current_closest_anchor_obj.orbit_radius:.5f}m), 星核已无效化 !!!")
-                logging.info(f"步进{step}: {current_closest_anchor_obj.name}沉眠 (距离{min_dist:.1f}m), 星核已无效化")
+                self._last_filter_step = None
+                min_dist = math.sqrt(min_d2)
+                logger.info("!!! 步进 %d: 星翎已触碰星核 %s  (距离 %.5fm < 轨道半径 %.5fm), 星核已无效化 !!!", step, current_closest_anchor_obj.name, min_dist, current_closest_anchor_obj.orbit_radius)
+                logger.info("步进%d: %s沉眠 (距离%.1fm), 星核已无效化", step, current_closest_anchor_obj.name, min_dist)
                 
         # ----------------------------------------
         # 引力计算和运动更新 (仅当未触发边界碰撞且未被捕获时执行)
         # 1. 筛选有效的引力源(排除失效的星核)
         # 2. 计算总引力加速度
         # 3. 使用高级积分方法更新速度和位置
-        logging.debug(f"步进{step}: 开始引力计算...")
+        if debug:
+            logger.debug("步进%d: 开始引力计算...", step)
         if not is_captured: # 未被捕获时，使用高级引力计算引擎
             # 筛选引力源，只考虑影响力最大的星核，排除无效的星核
-            active_anchors = []
-            for stellar in stellar_pearls:
-                # 检查星核是否无效，如果是无效的，检查是否已经超过60步
-                if not stellar.perturbations:
-                    if step - stellar.revival_rounds >= 60:
-                        # 超过60步，恢复星核有效性
-                        stellar.perturbations = True
-                        logging.info(f"步进{step}: 星核{stellar.name}已复苏")
-                    else:
-                        # 星核仍然无效，跳过
-                        continue
-                active_anchors.append(stellar)
-            
-            filtered_anchors = self.gravity_module.filter_gravity_sources_by_influence(
-                celestial_plume, active_anchors, influence_threshold=1e-6, max_sources=10
-            )
+            active_indices, active_rows = self._active_indices(stellar_pearls, step)
             
-            # 计算总引力加速度
-            acceleration = self.gravity_module.calculate_total_acceleration(
-                celestial_plume, filtered_anchors
-            )
-            
-            # 使用高级积分方法更新速度和位置
-            new_position, new_velocity = self.gravity_module.integrate_step(
-                celestial_plume, filtered_anchors, self.time_step
-            )
+            if active_rows is not None and self._can_fuse_step():
+                # 星核同属一个结构数组：筛选与积分在同一个数值内核中完成，不经过星核对象
+                soa = stellar_pearls[0].soa
+                chosen, new_position, new_velocity = self.gravity_module.select_and_integrate(
+                    celestial_plume, soa.positions, soa.masses, active_rows, self.time_step,
+                    self.INFLUENCE_THRESHOLD, self.max_sources
+                )
+                # 总加速度只用于日志输出，未开启INFO时不计算
+                if logger.isEnabledFor(logging.INFO):
+                    filtered_anchors = [stellar_pearls[i] for i in active_indices[chosen].tolist()]
+                    acceleration = self.gravity_module.calculate_total_acceleration(celestial_plume, filtered_anchors)
+            else:
+                if self._can_reuse_filter(celestial_plume, step):
+                    filtered_anchors, source_arrays, source_tree = self._last_filtered
+                else:
+                    filtered_anchors, source_arrays, source_tree = self._filter_sources(
+                        celestial_plume, stellar_pearls, active_indices, active_rows, step)
+                
+                # 总加速度只用于日志输出，未开启INFO时不计算
+                if logger.isEnabledFor(logging.INFO):
+                    acceleration = self.gravity_module.calculate_total_acceleration(
+                        celestial_plume, filtered_anchors, source_tree, source_arrays
+                    )
+                
+                # 使用高级积分方法更新速度和位置
+                new_position, new_velocity = self.gravity_module.integrate_step(
+                    celestial_plume, filtered_anchors, self.time_step, source_tree, source_arrays
+                )
             
             # 更新星翎的速度和位置
             celestial_plume.velocity = new_velocity
-            # 注意：位置更新会在后面的代码中进行
+            if self.gravity_module.integration_method == "verlet":
+                # 速度Verlet的位置与速度须成对更新才保持辛性质；星翎停在积分器给出的位置，下一步即可复用缓存的加速度
+                celestial_plume.position = new_position
+                moved = True
+            # 注意：其余积分方法的位置更新会在后面的代码中进行
         
-        # 更新位置
-        celestial_plume.position += celestial_plume.velocity * self.time_step
+        # 更新位置：直接在星翎坐标数组上原地计算，不经过Vector3D
+        if not moved:
+            position = celestial_plume.position_array
+            position += celestial_plume.velocity_array * self.time_step
 
-        history.append({
-            'step': step,
-            'position': celestial_plume.position,
-            'velocity': celestial_plume.velocity,
-            'is_captured': is_captured,
-            'capturing_anchor': (current_closest_anchor_obj.name) if is_captured else None,
-        })
+        if self.history.maxlen:
+            self.history.append({
+                'step': step,
+                'position': celestial_plume.position,
+                'velocity': celestial_plume.velocity,
+                'is_captured': is_captured,
+                'capturing_anchor': (current_closest_anchor_obj.name) if is_captured else None,
+            })
 
         result["positions"][id(celestial_plume)] = celestial_plume.position
         result["velocities"][id(celestial_plume)] = celestial_plume.velocity
 
         # 打印当前步进详细信息
         # 包括位置、速度、加速度(如果未被捕获)、最近星核信息
-        logging.debug(f"步进{step}: 计算完成，更新历史记录...")
-        logging.info(f"步进{step}: 位置={celestial_plume.position}, 速度={celestial_plume.velocity.magnitude():.4f}m/s, {'' if is_captured else f'加速度={acceleration}'}, 最近星核: {current_closest_anchor_obj.name}({min_dist:.4f}m) {' [已捕获]' if is_captured else '' }")
+        if debug:
+            logger.debug("步进%d: 计算完成，更新历史记录...", step)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("步进%d: 位置=%s, 速度=%.4fm/s, %s, 最近星核: %s(%.4fm) %s",
+                        step, celestial_plume.position, celestial_plume.velocity.magnitude(),
+                        '' if is_captured else f'加速度={acceleration}',
+                        current_closest_anchor_obj.name, math.sqrt(min_d2), ' [已捕获]' if is_captured else '')
 
         return result
     
+    def _active_indices(self, stellar_pearls: List[StellarPearl], step: int) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        选出仍产生引力扰动的星核；失效已满60步的星核在此复苏
+        
+        星核同属一个结构数组时直接以扰动掩码与失效步数数组整体判断，否则逐个检查
+        
+        Args:
+            stellar_pearls: 星核列表
+            step: 当前步数
+            
+        Returns:
+            Tuple[np.ndarray, Optional[np.ndarray]]: (有效星核在列表中的下标, 其在结构数组中的行号；星核不属同一结构数组时为None)
+        """
+        soa = stellar_pearls[0].soa if stellar_pearls else None
+        if soa is None or not all(s.soa is soa for s in stellar_pearls):
+            active_indices = []
+            for i, stellar in enumerate(stellar_pearls):
+                # 检查星核是否无效，如果是无效的，检查是否已经超过60步
+                if not stellar.perturbations:
+                    if step - stellar.revival_rounds >= 60:
+                        # 超过60步，恢复星核有效性
+                        stellar.perturbations = True
+                        self._last_filter_step = None
+                        logger.info("步进%d: 星核%s已复苏", step, stellar.name)
+                    else:
+                        # 星核仍然无效，跳过
+                        continue
+                active_indices.append(i)
+            return np.array(active_indices, dtype=np.intp), None
+        
+        rows = np.fromiter((s.soa_index for s in stellar_pearls), dtype=np.intp, count=len(stellar_pearls))
+        perturbing = soa.perturbations_mask[rows]
+        revived = ~perturbing & (step - soa.revival_rounds[rows] >= 60)
+        if revived.any():
+            # 超过60步，恢复星核有效性
+            soa.perturbations_mask[rows[revived]] = True
+            self._last_filter_step = None
+            for i in np.flatnonzero(revived).tolist():
+                logger.info("步进%d: 星核%s已复苏", step, stellar_pearls[i].name)
+            perturbing |= revived
+        active_indices = np.flatnonzero(perturbing)
+        return active_indices, rows[active_indices]
+    
+    def _can_fuse_step(self) -> bool:
+        """
+        判断本步能否由引力模块的select_and_integrate一次完成筛选与积分
+        
+        要求每步重新筛选、积分方法不依赖星翎上的加速度缓存，且引力源数量不会触发八叉树
+        
+        Returns:
+            bool: 是否走融合内核
+        """
+        return (self.refilter_interval == 1
+                and self.gravity_module.integration_method != "verlet"
+                and self.max_sources < self.gravity_module.BARNES_HUT_MIN_SOURCES)
+    
+    def _can_reuse_filter(self, celestial_plume: CelestialPlume, step: int) -> bool:
+        """
+        判断上次的引力源筛选结果能否沿用：未超过筛选间隔、星翎移动未超过阈值且期间没有星核失效或复苏
+        
+        Args:
+            celestial_plume: 星翎对象
+            step: 当前步数
+            
+        Returns:
+            bool: 是否沿用上次的筛选结果
+        """
+        if self._last_filter_step is None or not 0 <= step - self._last_filter_step < self.refilter_interval:
+            return False
+        offset = celestial_plume.position_array - self._last_filter_position
+        return float(offset @ offset) <= self.refilter_distance * self.refilter_distance
+    
+    def _filter_sources(self, celestial_plume: CelestialPlume, stellar_pearls: List[StellarPearl],
+                        active_indices: np.ndarray, active_rows: Optional[np.ndarray],
+                        step: int) -> Tuple[List[StellarPearl], Tuple[np.ndarray, np.ndarray], Any]:
+        """
+        筛选影响星翎的引力源，并整理出其坐标质量数组与八叉树，结果保留供后续步进沿用
+        
+        Args:
+            celestial_plume: 星翎对象
+            stellar_pearls: 星核列表
+            active_indices: 有效星核在列表中的下标
+            active_rows: 有效星核在结构数组中的行号，星核不属同一结构数组时为None
+            step: 当前步数
+            
+        Returns:
+            Tuple: (筛选后的引力源, (坐标数组, 质量数组), 八叉树或None)
+        """
+        active_anchors = [stellar_pearls[i] for i in active_indices.tolist()]
+        if active_rows is not None:
+            # 星核同属一个结构数组：坐标与质量按行号整体取出，不逐个读取星核属性
+            soa = stellar_pearls[0].soa
+            arrays = (soa.positions[active_rows], soa.masses[active_rows])
+        else:
+            arrays = self.gravity_module.source_arrays(active_anchors)
+        
+        # 引力源的坐标与质量只整理一次成数组，筛选、建树与各积分阶段共用
+        filtered_anchors = self.gravity_module.filter_gravity_sources_by_influence(
+            celestial_plume, active_anchors, influence_threshold=self.INFLUENCE_THRESHOLD, max_sources=self.max_sources,
+            arrays=arrays
+        )
+        source_arrays = self.gravity_module.source_arrays(filtered_anchors)
+        
+        # 引力源足够多时建一次八叉树，本步的各次加速度计算共用
+        source_tree = self.gravity_module.build_source_tree(filtered_anchors, source_arrays)
+        
+        self._last_filter_step = step
+        self._last_filter_position = celestial_plume.position_array.copy()
+        self._last_filtered = (filtered_anchors, source_arrays, source_tree)
+        return self._last_filtered
+    
     def _update_position(self, celestial_plume: CelestialPlume):
         """
         更新星翎位置
@@ -193,13 +352,15 @@ class OrbitalLoom:
             bool: 是否被捕获
         """
         # 计算星翎与星核的距离
-        dx = celestial_plume.position.x - stellar_pearl.position.x
-        dy = celestial_plume.position.y - stellar_pearl.position.y
-        dz = celestial_plume.position.z - stellar_pearl.position.z
-        distance = (dx**2 + dy**2 + dz**2)**0.5
+        plume_position = celestial_plume.position
+        pearl_position = stellar_pearl.position
+        dx = plume_position.x - pearl_position.x
+        dy = plume_position.y - pearl_position.y
+        dz = plume_position.z - pearl_position.z
         
-        # 如果距离小于星核的轨道高度，则认为被捕获
-        return distance < stellar_pearl.orbit_radius
+        # 如果距离小于星核的轨道高度，则认为被捕获；以平方比较，无需开方
+        orbit_radius = stellar_pearl.orbit_radius
+        return dx * dx + dy * dy + dz * dz < orbit_radius * orbit_radius
     
     def get_capture_events(self) -> List[Dict[str, Any]]:
         """
@@ -1,20 +1,34 @@
-from typing import List, Dict, Any
+from typing import Dict, Any
 import math
-import torch
 import numpy as np
-import matplotlib.pyplot as plt
 import logging
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib.collections import LineCollection
-from matplotlib.colors import LinearSegmentedColormap
 from .models.astral_canopy import AstralCanopy
 from .models.stellar_pearl import StellarPearl
 from .models.celestial_plume import CelestialPlume
+from .models.simulation_history import SimulationHistory
 from .models.vector3d import Vector3D
 from .modules.gravity_loom import GravityLoom
 from .modules.orbital_loom import OrbitalLoom
 from .modules.boundary.base import BoundaryAtrium
 
+logger = logging.getLogger(__name__)
+
+def _unit_sphere(resolution: int):
+    """
+    生成单位球面网格，缩放平移后即可绘制任意球体
+    
+    Args:
+        resolution: 经纬方向的采样数
+        
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: 形状均为 (resolution, resolution) 的x、y、z坐标
+    """
+    u = np.linspace(0, 2 * math.pi, resolution)
+    v = np.linspace(0, math.pi, resolution)
+    return (np.outer(np.cos(u), np.sin(v)),
+            np.outer(np.sin(u), np.sin(v)),
+            np.outer(np.ones(resolution), np.cos(v)))
+
 class StellarCourtyard:
     """星枢庭园：星系管理中心"""
     
@@ -27,12 +41,18 @@ class StellarCourtyard:
         self.constants = {
             "gravity_constant": 0.1,       # 重力常数
             "speed_of_light": 299792458.0, # 光速
-            "gravity_force_min_distance": 1e-3           # 引力最小作用距离
+            "gravity_force_min_distance": 1e-3,          # 引力最小作用距离
+            "barnes_hut_theta": GravityLoom.BARNES_HUT_THETA,  # Barnes–Hut张角阈值，越小越精确
+            "max_sources": OrbitalLoom.MAX_SOURCES,  # 每步参与引力计算的引力源上限，不少于GravityLoom.BARNES_HUT_MIN_SOURCES时启用八叉树
+            "dtype": np.float64            # 星核坐标、速度与质量的存储精度，np.float32减半内存读取
         }
         self.time_step = 0.01
-        self.disabled_gravity_timers: Dict[int, int] = {}
+        # 捕获事件以id指认星核；沉眠计时器存放在星核结构数组中，随星核的增删一并搬移
+        self._pearl_by_id: Dict[int, StellarPearl] = {}
+        self._sleeping_count = 0  # 正在沉眠的星核数，为0时每步跳过计时器更新
     
-    def set_constants(self, gravity_constant: float = None, speed_of_light: float = None, gravity_force_min_distance: float = None):
+    def set_constants(self, gravity_constant: float = None, speed_of_light: float = None, gravity_force_min_distance: float = None,
+                      barnes_hut_theta: float = None, max_sources: int = None, dtype=None):
         """
         调谐星律
         
@@ -40,6 +60,9 @@ class StellarCourtyard:
             gravity_constant: 重力常数
             speed_of_light: 光速
             gravity_force_min_distance: 引力涟漪距离
+            barnes_hut_theta: Barnes–Hut张角阈值，为0时始终两两精确求和
+            max_sources: 每步参与引力计算的引力源上限，build_galaxy时生效
+            dtype: 星核的存储精度(np.float64或np.float32)，build_galaxy时生效
         """
         if gravity_constant is not None:
             self.constants["gravity_constant"] = gravity_constant
@@ -47,6 +70,12 @@ class StellarCourtyard:
             self.constants["speed_of_light"] = speed_of_light
         if gravity_force_min_distance is not None:
             self.constants["gravity_force_min_distance"] = gravity_force_min_distance
+        if barnes_hut_theta is not None:
+            self.constants["barnes_hut_theta"] = barnes_hut_theta
+        if max_sources is not None:
+            self.constants["max_sources"] = max_sources
+        if dtype is not None:
+            self.constants["dtype"] = np.dtype(dtype).type
     
     def build_galaxy(self, central_mass: float, boundary_type: str, reflection_angle: float = 0, reflection_angle_range: float = math.pi/3):
         """
@@ -61,6 +90,7 @@ class StellarCourtyard:
             speed_of_light=self.constants["speed_of_light"],
             gravity_constant=self.constants["gravity_constant"],
             gravity_force_min_distance=self.constants["gravity_force_min_distance"],
+            barnes_hut_theta=self.constants["barnes_hut_theta"],
         )
 
         # 创建星穹领域
@@ -69,15 +99,19 @@ class StellarCourtyard:
             central_mass=central_mass,
             boundary_type=boundary_type,
             reflection_angle=reflection_angle,
-            reflection_angle_range=reflection_angle_range
+            reflection_angle_range=reflection_angle_range,
+            dtype=self.constants["dtype"]
         )
         
         # 创建星轨织机
         self.simulation_module = OrbitalLoom(
             gravity_module=self.gravity_module,
             boundary_effect=self.galaxy_model.boundary_effect,
-            time_step=self.time_step
+            time_step=self.time_step,
+            max_sources=self.constants["max_sources"]
         )
+        self._pearl_by_id = {}
+        self._sleeping_count = 0  # 正在沉眠的星核数，为0时每步跳过计时器更新
         
         # 将模块设置到星穹领域
         self.galaxy_model.set_gravity_module(self.gravity_module)
@@ -98,6 +132,7 @@ class StellarCourtyard:
         orbit_velocity, escape_velocity = self.gravity_module.calculate_orbital_escape_velocities(mass, orbit_raduis)
         stellar_pearl = StellarPearl(name, position, mass, orbit_raduis, orbit_velocity, escape_velocity)
         self.galaxy_model.add_stellar_pearl(stellar_pearl)
+        self._pearl_by_id[id(stellar_pearl)] = stellar_pearl
         return stellar_pearl
     
     def remove_stellar_pearl(self, stellar_pearl: StellarPearl):
@@ -107,6 +142,10 @@ class StellarCourtyard:
         Args:
             stellar_pearl: 要移除的星核对象
         """
+        if self._pearl_by_id.pop(id(stellar_pearl), None) is None:
+            return
+        if self.galaxy_model.pearl_soa.sleep_timers[stellar_pearl.soa_index] >= 0:
+            self._sleeping_count -= 1
         self.galaxy_model.remove_stellar_pearl(stellar_pearl)
     
     def set_celestial_plume(self, mass: float, position: Vector3D, velocity: Vector3D) -> CelestialPlume:
@@ -122,7 +161,7 @@ class StellarCourtyard:
             CelestialPlume: 创建的星翎对象
         """
         celestial_plume = CelestialPlume(position, velocity, mass)
-        logging.info(self.galaxy_model)
+        logger.info(self.galaxy_model)
         self.galaxy_model.celestial_plume = celestial_plume
         return celestial_plume
     
@@ -146,7 +185,7 @@ class StellarCourtyard:
         if self.simulation_module:
             self.simulation_module.time_step = time_step
     
-    def run_simulation(self, steps: int) -> List[Dict[str, Any]]:
+    def run_simulation(self, steps: int) -> SimulationHistory:
         """
         流转星轨
         
@@ -154,56 +193,70 @@ class StellarCourtyard:
             steps: 运转步数
             
         Returns:
-            List[Dict[str, Any]]: 每步的运行结果
+            SimulationHistory: 星翎每步的坐标与速度，以及捕获与边界碰撞事件
         """
         if not self.galaxy_model or not self.simulation_module:
             raise RuntimeError("Galaxy not built. Please call build_galaxy() first.")
         
-        logging.info(f"准备模拟，总步数={steps}")
-        logging.debug(f"星系模型: {self.galaxy_model}")
-        logging.debug(f"时间步长: {self.time_step}")
+        logger.info("准备模拟，总步数=%d", steps)
+        # 日志级别在步进循环前读取一次，关闭时每步的日志调用连同参数求值一并跳过
+        debug = logger.isEnabledFor(logging.DEBUG)
+        info = logger.isEnabledFor(logging.INFO)
+        if debug:
+            logger.debug("星系模型: %s", self.galaxy_model)
+            logger.debug("时间步长: %s", self.time_step)
         
-        # 检查星核和星翎
+        # 检查星核和星翎；星核列表在整个步进循环中沿用，模拟期间不增删星核
         stellar_pearls = self.galaxy_model.get_stellar_pearls()
         if not stellar_pearls or len(stellar_pearls) == 0:
-            logging.warning("没有星核存在，无法进行模拟")
+            logger.warning("没有星核存在，无法进行模拟")
         if not self.galaxy_model.celestial_plume:
             raise RuntimeError("没有星翎存在，无法进行模拟")
             
-        results = []
+        celestial_plume = self.galaxy_model.celestial_plume
+        history = SimulationHistory(steps)
         
         try:
             for time in range(steps):
-                logging.debug(f"开始步进 {time+1}/{steps}")
+                if debug:
+                    logger.debug("开始步进 %d/%d", time + 1, steps)
                 
                 # 运行一步模拟
                 result = self.simulation_module.step(
                     stellar_pearls,
-                    self.galaxy_model.celestial_plume,
+                    celestial_plume,
                     time  # 每次只步进1步
                 )
                 
-                logging.debug(f"步进{time}完成，结果: {result}")
+                if debug:
+                    logger.debug("步进%d完成，结果: %s", time, result)
                 
-                # 处理捕获事件
-                self._handle_capture_events(result)
+                # 处理捕获事件；没有捕获与沉眠星核的步进（绝大多数）不进入这两个方法
+                if result["captures"]:
+                    self._handle_capture_events(result)
                 
                 # 更新禁用引力计时器
-                self._update_gravity_timers()
+                if self._sleeping_count:
+                    self._update_gravity_timers()
                 
-                results.append(result)
+                # 直接从星翎数组记录本步结果，不保留每步的结果字典
+                history.record(celestial_plume.position_array, celestial_plume.velocity_array)
+                for capture in result["captures"]:
+                    history.record_capture(time, capture["stellar_pearl_id"])
+                if result["boundary_collisions"]:
+                    history.record_collision(time, celestial_plume.position_array, celestial_plume.velocity_array)
                 
                 # 定期打印进度
-                if (time + 1) % 10 == 0:
-                    logging.info(f"已完成 {time+1}/{steps} 步 ({((time+1)/steps)*100:.1f}%)")
+                if info and (time + 1) % 10 == 0:
+                    logger.info("已完成 %d/%d 步 (%.1f%%)", time + 1, steps, (time + 1) / steps * 100)
                     
         except Exception as e:
-            logging.error(f"模拟在步进 {time} 时出错: {str(e)}")
+            logger.error("模拟在步进 %d 时出错: %s", time, e)
             raise
             
-        logging.info("模拟完成")
+        logger.info("模拟完成")
         
-        return results
+        return history
     
     def _handle_capture_events(self, result: Dict[str, Any]):
         """
@@ -212,87 +265,74 @@ class StellarCourtyard:
         Args:
             result: 运行结果
         """
-        if result is None or "captures" not in result:
+        if not result or not result.get("captures"):
             return
-            
+        
+        timers = self.galaxy_model.pearl_soa.sleep_timers
         for capture in result["captures"]:
-            stellar_pearl_id = capture["stellar_pearl_id"]
-            
-            # 找到对应的星核
-            stellar_pearl = None
-            
-            for sp in self.galaxy_model.get_stellar_pearls():
-                if id(sp) == stellar_pearl_id:
-                    stellar_pearl = sp
-                    break
+            # 按id直接找到对应的星核
+            stellar_pearl = self._pearl_by_id.get(capture["stellar_pearl_id"])
             
-            if stellar_pearl:
+            if stellar_pearl is not None:
                 # 星核沉眠
                 stellar_pearl.perturbations = False
                 # 设置恢复计时器
-                self.disabled_gravity_timers[stellar_pearl_id] = 60  # 60步后恢复
+                idx = stellar_pearl.soa_index
+                if timers[idx] < 0:
+                    self._sleeping_count += 1
+                timers[idx] = 60  # 60步后恢复
     
     def _update_gravity_timers(self):
-        """更新星核沉眠计时器"""
-        to_remove = []
-        
-        for stellar_pearl_id, timer in self.disabled_gravity_timers.items():
-            self.disabled_gravity_timers[stellar_pearl_id] = timer - 1
-            
-            if timer <= 0:
-                # 找到对应的星核并恢复引力
-                for stellar_pearl in self.galaxy_model.get_stellar_pearls():
-                    if id(stellar_pearl) == stellar_pearl_id:
-                        stellar_pearl.enable_gravity()
-                        break
-                
-                to_remove.append(stellar_pearl_id)
-        
-        for stellar_pearl_id in to_remove:
-            del self.disabled_gravity_timers[stellar_pearl_id]
+        """更新星核沉眠计时器：全部计时器整体倒数，归零后的下一步恢复星核引力"""
+        if not self._sleeping_count:
+            return
+        soa = self.galaxy_model.pearl_soa
+        timers = soa.sleep_timers
+        expired = np.flatnonzero(timers == 0)
+        timers[timers >= 0] -= 1
+        self._sleeping_count -= len(expired)
+        soa.perturbations_mask[expired] = True
     
-    def plot_simulation(self, results: List[Dict[str, Any]], title: str = "星轨模拟结果", oort_cloud_radius: float = None):
+    def plot_simulation(self, history: SimulationHistory, title: str = "星轨模拟结果", oort_cloud_radius: float = None):
         """
         绘制模拟轨迹图 - 增强版 (基于sample实现优化)
         
         Args:
-            results: 模拟结果列表
+            history: run_simulation返回的星轨卷轴
             title: 图表标题
             oort_cloud_radius: 奥尔特云半径，用于绘制灰色球体边界
         """
+        # matplotlib只在绘图时导入，不绘图的运行省去其导入开销
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import LinearSegmentedColormap
+        from mpl_toolkits.mplot3d import Axes3D  # 注册3d投影
+        from mpl_toolkits.mplot3d.art3d import Line3DCollection
+        
         # 设置中文字体支持
         plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
         plt.rcParams['axes.unicode_minus'] = False
         
-        # 提取轨迹数据（添加防御性检查）
-        positions = []
-        for state in results:
-            if state is None or 'positions' not in state or id(self.galaxy_model.celestial_plume) not in state['positions']:
-                continue
-            pos = state['positions'][id(self.galaxy_model.celestial_plume)]
-            positions.append([pos.x, pos.y, pos.z])
-        
-        
-        if not positions:
+        # 轨迹数据直接取自预分配的坐标数组
+        if len(history) == 0:
             raise ValueError("没有有效的轨迹数据可用于绘图")
             
-        positions = torch.tensor(positions, dtype=torch.float32)
+        positions = history.positions.astype(np.float32)
+        has_trajectory = len(positions) > 1  # 只有一个点时不绘制轨迹、颜色条与终点
         
         # 提取warp事件索引
-        warp_indices = [i for i, state in enumerate(results)
-                       if state.get('boundary_collisions', [])]
+        warp_indices = [step for step, _, _ in history.collisions]
         
         # 创建3D图形
         fig = plt.figure(figsize=(12, 10))
         ax = fig.add_subplot(111, projection='3d')
         
         # 创建渐变色轨迹
-        step_size = max(1, len(positions) // 1000)
-        sampled_positions = positions[::step_size]
-        
-        if len(sampled_positions) > 1:
+        if has_trajectory:
+            step_size = max(1, len(positions) // 1000)
+            sampled_positions = positions[::step_size]
+            
             # 创建渐变色轨迹
-            points = sampled_positions.reshape(-1, 1, 3).numpy()
+            points = sampled_positions.reshape(-1, 1, 3)
             segments = np.concatenate([points[:-1], points[1:]], axis=1)
             
             # 使用连续的颜色映射
@@ -300,11 +340,9 @@ class StellarCourtyard:
                 ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b'])
             norm = plt.Normalize(0, len(segments))
             
-            # 为每个线段创建渐变色
-            for i, segment in enumerate(segments):
-                color = cmap(norm(i))
-                ax.plot(segment[:, 0], segment[:, 1], segment[:, 2],
-                       color=color, linewidth=1.2, alpha=0.8)
+            # 全部线段放进一个集合，按序号着渐变色，一次绘制
+            ax.add_collection3d(Line3DCollection(segments, colors=cmap(norm(np.arange(len(segments)))),
+                                                 linewidths=1.2, alpha=0.8))
             
             # 添加颜色条
             sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
@@ -313,11 +351,8 @@ class StellarCourtyard:
             cbar.set_label('轨迹进度 (起点→终点)')
         
         # 如果有warp事件，用不同方式处理颜色渐变
-        if warp_indices:
+        if has_trajectory and warp_indices:
             # 创建基于warp事件的颜色渐变
-            all_segments = []
-            colors = []
-            
             start_idx = 0
             segment_colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
             
@@ -330,58 +365,44 @@ class StellarCourtyard:
                         sampled_segment = segment_positions[::step_size]
                         
                         # 为每个子段创建渐变色
-                        points = sampled_segment.reshape(-1, 1, 3).numpy()
+                        points = sampled_segment.reshape(-1, 1, 3)
                         segments = np.concatenate([points[:-1], points[1:]], axis=1)
                         
                         base_color = segment_colors[segment_idx % len(segment_colors)]
                         cmap = LinearSegmentedColormap.from_list(f'segment_{segment_idx}',
                             ['white', base_color, base_color])
                         
-                        for i, segment in enumerate(segments):
-                            color_intensity = (i / max(1, len(segments) - 1))
-                            color = cmap(color_intensity)
-                            ax.plot(segment[:, 0], segment[:, 1], segment[:, 2],
-                                   color=color, linewidth=1.2, alpha=0.8)
+                        color_intensity = np.arange(len(segments)) / max(1, len(segments) - 1)
+                        ax.add_collection3d(Line3DCollection(segments, colors=cmap(color_intensity),
+                                                             linewidths=1.2, alpha=0.8))
                 
                 start_idx = end_idx
         
         # 标记起点和终点
-        positions_np = positions.numpy()
-        ax.scatter(positions_np[0, 0], positions_np[0, 1], positions_np[0, 2],
+        ax.scatter(positions[0, 0], positions[0, 1], positions[0, 2],
                   color='green', s=100, label='起点')
-        ax.scatter(positions_np[-1, 0], positions_np[-1, 1], positions_np[-1, 2],
-                  color='red', s=100, label='终点')
+        if has_trajectory:
+            ax.scatter(positions[-1, 0], positions[-1, 1], positions[-1, 2],
+                      color='red', s=100, label='终点')
         
         # 绘制星核位置和轨道半径
+        # 轨道球面的经纬线取自同一个单位球网格，各星核只需缩放平移
+        sphere = np.stack(_unit_sphere(20), axis=-1)  # (20, 20, 3)
+        mesh_lines = np.concatenate([sphere[0:20:5, :, :], sphere[:, 0:20:5, :].transpose(1, 0, 2)])
         for pearl in self.galaxy_model.get_stellar_pearls():
             # 绘制星核
-            ax.scatter(pearl.position.x, pearl.position.y, pearl.position.z,
+            position = pearl.position
+            ax.scatter(position.x, position.y, position.z,
                       color='orange', s=150, marker='*', label=pearl.name)
             
             # 绘制轨道半径
-            u = torch.linspace(0, 2 * math.pi, 20)
-            v = torch.linspace(0, math.pi, 20)
-            u_np = u.numpy()
-            v_np = v.numpy()
-            x = pearl.orbit_radius * np.outer(np.cos(u_np), np.sin(v_np)) + pearl.position.x
-            y = pearl.orbit_radius * np.outer(np.sin(u_np), np.sin(v_np)) + pearl.position.y
-            z = pearl.orbit_radius * np.outer(np.ones(np.size(u_np)), np.cos(v_np)) + pearl.position.z
-            
-            for j in range(0, 20, 5):
-                ax.plot(x[j, :], y[j, :], z[j, :], color='orange', alpha=0.2, linewidth=0.5)
-            for j in range(0, 20, 5):
-                ax.plot(x[:, j], y[:, j], z[:, j], color='orange', alpha=0.2, linewidth=0.5)
+            lines = pearl.orbit_radius * mesh_lines + (position.x, position.y, position.z)
+            ax.add_collection3d(Line3DCollection(lines, colors='orange', alpha=0.2, linewidths=0.5))
         
         # 绘制奥尔特云球体（透明度30%的灰色球体）
         if oort_cloud_radius is not None:
-            # 使用meshgrid生成更精确的球体坐标
-            u = torch.linspace(0, 2 * math.pi, 100)
-            v = torch.linspace(0, math.pi, 100)
-            u_np = u.numpy()
-            v_np = v.numpy()
-            x = oort_cloud_radius * np.outer(np.cos(u_np), np.sin(v_np))
-            y = oort_cloud_radius * np.outer(np.sin(u_np), np.sin(v_np))
-            z = oort_cloud_radius * np.outer(np.ones(np.size(u_np)), np.cos(v_np))
+            # 使用更精细的单位球网格生成球体坐标
+            x, y, z = (oort_cloud_radius * c for c in _unit_sphere(100))
             
             # 绘制球体表面，确保形状正确
             ax.plot_surface(x, y, z,
@@ -437,7 +458,7 @@ class StellarCourtyard:
             "central_mass": self.galaxy_model.central_mass,
             "boundary_type": self.galaxy_model.boundary_type,
             "stellar_pearls_count": len(self.galaxy_model.get_stellar_pearls()),
-            "disabled_gravity_count": len(self.disabled_gravity_timers),
+            "disabled_gravity_count": self._sleeping_count,
             "constants": self.constants,
             "time_step": self.time_step
         }
\ No newline at end of file
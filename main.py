@@ -53,7 +53,7 @@ def main():
     
     # 获取奥尔特云半径
     oort_cloud_radius = terminal.galaxy_model.oort_cloud_radius
-    logging.info(f"奥尔特云半径: {oort_cloud_radius}")
+    logging.info("奥尔特云半径: %s", oort_cloud_radius)
     # 使用泊松盘采样算法生成均匀分布的点位
     # 最小距离设为奥尔特云半径的10%，确保点之间有足够的间距
     min_distance = oort_cloud_radius * 0.1
@@ -97,24 +97,23 @@ def main():
     # 运行模拟
     logging.info("开始星系模拟...")
     status = terminal.get_galaxy_status()
-    logging.info(f"星系状态: {status}")
+    logging.info("星系状态: %s", status)
     
     # 运行365步（1年）
-    results = terminal.run_simulation(5000)
+    history = terminal.run_simulation(5000)
     
     logging.info("模拟完成！")
-    logging.info(f"运行了 {len(results)} 步")
+    logging.info("运行了 %d 步", len(history))
     
     # 显示最后一步的结果
-    final_result = results[-1]
-    logging.info(f"最后一步的位置: {final_result['positions']}")
-    logging.info(f"最后一步的速度: {final_result['velocities']}")
-    logging.info(f"捕获事件: {final_result['captures']}")
-    logging.info(f"边界碰撞: {final_result['boundary_collisions']}")
+    logging.info("最后一步的位置: %s", history.positions[-1])
+    logging.info("最后一步的速度: %s", history.velocities[-1])
+    logging.info("捕获事件: %s", history.captures)
+    logging.info("边界碰撞: %d 次", len(history.collisions))
     
     # 如果启用了可视化模式则绘制模拟轨迹图
     if args.visual:
-        terminal.plot_simulation(results, "星系模拟轨迹", oort_cloud_radius=oort_cloud_radius)
+        terminal.plot_simulation(history, "星系模拟轨迹", oort_cloud_radius=oort_cloud_radius)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,8 +2,260 @@
 泊松盘采样算法模块
 提供在球体空间内生成均匀分布随机点的功能
 """
-import torch
 import math
+import random
+import numpy as np
+from galaxy_system._jit import njit, NUMBA_AVAILABLE
+
+_DRAW_BLOCK = 64  # 随机数每次预取多少个活动点的用量
+
+
+def _neighbor_offsets():
+    """
+    候选点邻域的单元格偏移表：候选点所在单元格及其周围共3×3×3个单元格，由近及远排列
+
+    单元格边长等于最小距离，与候选点距离小于最小距离的点所在单元格的下标差不超过1
+
+    返回:
+        np.ndarray: 偏移数组 (27, 3)
+    """
+    span = np.arange(-1, 2)
+    offsets = np.stack(np.meshgrid(span, span, span, indexing='ij'), axis=-1).reshape(-1, 3)
+    # 由近及远检查，被拒绝的候选点多在最近的几个单元格中遇到过近的点，尽早退出
+    return offsets[np.argsort((offsets * offsets).sum(axis=1), kind='stable')]
+
+
+@njit(cache=True)
+def _first_valid_candidate(px, py, pz, draws, min_distance3, shell3, check_sphere, radius2,
+                           grid, chain, grid_offset, inv_cell, offsets, coords, min_distance2):
+    """
+    在活动点周围逐个生成候选点，返回第一个落在球体内且与邻近点保持最小距离的候选点
+
+    候选点按顺序检查，找到有效者即停止，其后的候选点与邻近点不再计算；
+    每个候选点只按偏移表检查其自身单元格周围的单元格，而非覆盖全部候选点的整块邻域，
+    并沿单元格点链表逐个检查其中的点
+
+    参数:
+        px, py, pz: 活动点坐标
+        draws: 候选点的均匀随机数 (3, max_attempts)，依次用于方位角、仰角余弦与半径
+        min_distance3: 采样半径下限的立方
+        shell3: 采样半径上限与下限的立方差
+        check_sphere: 是否需要检查候选点在球体内
+        radius2: 球体半径的平方
+        grid: 网格，存放各单元格点链表首个点的序号加1，0为空
+        chain: 单元格点链表，chain[n]为与点n同单元格的下一个点的序号加1，0为链尾
+        grid_offset: 网格原点坐标
+        inv_cell: 单元格边长的倒数
+        offsets: 单个候选点邻域的单元格偏移表 (K, 3)，见_neighbor_offsets
+        coords: 已采样点坐标数组
+        min_distance2: 最小距离的平方
+
+    返回:
+        tuple: (候选点序号, x, y, z, 模长平方)，全部无效时序号为-1
+    """
+    # 网格按一维展平，步长手工计算寻址
+    grid_size = grid.shape[0]
+    flat_grid = grid.reshape(-1)
+    stride_x = grid_size * grid_size
+    for k in range(draws.shape[1]):
+        theta = draws[0, k] * (2 * math.pi)
+        u = draws[1, k]
+        # 球壳体积元为r²dr，半径按r³均匀抽取，候选点在球壳内按体积均匀分布
+        r = (min_distance3 + draws[2, k] * shell3) ** (1.0 / 3.0)
+        # cosφ = 1-2u 使方向在球面上均匀分布，sinφ = √(1-cos²φ) = 2√(u(1-u))
+        cos_phi = 1.0 - 2.0 * u
+        sin_phi = 2.0 * math.sqrt(u * (1.0 - u))
+        x = px + r * sin_phi * math.cos(theta)
+        y = py + r * sin_phi * math.sin(theta)
+        z = pz + r * cos_phi
+        norm2 = x * x + y * y + z * z
+        if check_sphere and norm2 > radius2:
+            continue
+        cx = int((x - grid_offset) * inv_cell)
+        cy = int((y - grid_offset) * inv_cell)
+        cz = int((z - grid_offset) * inv_cell)
+        conflict = False
+        for m in range(offsets.shape[0]):
+            i = cx + offsets[m, 0]
+            j = cy + offsets[m, 1]
+            l = cz + offsets[m, 2]
+            if i < 0 or i >= grid_size or j < 0 or j >= grid_size or l < 0 or l >= grid_size:
+                continue
+            n = flat_grid[i * stride_x + j * grid_size + l]
+            while n:
+                dx = x - coords[n - 1, 0]
+                dy = y - coords[n - 1, 1]
+                dz = z - coords[n - 1, 2]
+                if dx * dx + dy * dy + dz * dz < min_distance2:
+                    conflict = True  # 遇到第一个过近的点即放弃该候选点
+                    break
+                n = chain[n - 1]
+            if conflict:
+                break
+        if not conflict:
+            return k, x, y, z, norm2
+    return -1, 0.0, 0.0, 0.0, 0.0
+
+
+def _first_valid_candidate_batch(px, py, pz, draws, min_distance3, shell3, check_sphere, radius2,
+                                 grid, chain, grid_x, grid_y, grid_z, search_radius, coords, coord_norm2, min_distance2):
+    """
+    _first_valid_candidate的数组版本：全部候选点一次生成，与邻近点的距离矩阵由一次矩阵乘法给出，供未安装numba时使用
+
+    参数:
+        px, py, pz: 活动点坐标
+        draws: 候选点的均匀随机数 (3, max_attempts)，依次用于方位角、仰角余弦与半径
+        min_distance3: 采样半径下限的立方
+        shell3: 采样半径上限与下限的立方差
+        check_sphere: 是否需要检查候选点在球体内
+        radius2: 球体半径的平方
+        grid: 网格，见_first_valid_candidate
+        chain: 单元格点链表，见_first_valid_candidate
+        grid_x, grid_y, grid_z: 活动点所在单元格
+        search_radius: 覆盖全部候选点邻域的单元格半径
+        coords: 已采样点坐标数组
+        coord_norm2: 已采样点模长平方数组
+        min_distance2: 最小距离的平方
+
+    返回:
+        同_first_valid_candidate
+    """
+    theta = draws[0] * (2 * math.pi)
+    u = draws[1]
+    # 逐个以标量幂求半径，与编译版本的结果逐位一致（数组幂可能走向量化实现，末位不同）
+    r = np.array([(min_distance3 + u * shell3) ** (1.0 / 3.0) for u in draws[2].tolist()])
+    # cosφ = 1-2u 使方向在球面上均匀分布，sinφ = √(1-cos²φ) = 2√(u(1-u))
+    cos_phi = 1.0 - 2.0 * u
+    sin_phi = 2.0 * np.sqrt(u * (1.0 - u))
+    candidates = np.column_stack((px + r * sin_phi * np.cos(theta),
+                                  py + r * sin_phi * np.sin(theta),
+                                  pz + r * cos_phi))
+    
+    # 检查是否在球体内；候选点模长平方在下方距离矩阵中复用
+    candidate_norm2 = np.einsum('ij,ij->i', candidates, candidates)
+    if check_sphere:
+        valid = candidate_norm2 <= radius2
+    else:
+        valid = np.ones(len(candidates), dtype=bool)
+    
+    # 候选点都在活动点r_max范围内，一次取出覆盖全部候选点邻域的单元格，批量检查与已有点的距离
+    cells = grid[max(0, grid_x - search_radius):max(0, grid_x + search_radius + 1),
+                 max(0, grid_y - search_radius):max(0, grid_y + search_radius + 1),
+                 max(0, grid_z - search_radius):max(0, grid_z + search_radius + 1)]
+    # 沿各单元格的点链表同步前进，每轮取出每条链上的下一个点
+    heads = cells[cells != 0]
+    chunks = []
+    while len(heads):
+        members = heads.astype(np.intp) - 1
+        chunks.append(members)
+        heads = chain[members]
+        heads = heads[heads != 0]
+    neighbors = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.intp)
+    if len(neighbors):
+        # |c-n|² = |c|² + |n|² - 2c·n
+        d2 = (candidate_norm2[:, None]
+              + coord_norm2[neighbors]
+              - 2.0 * (candidates @ coords[neighbors].T))
+        valid &= (d2 >= min_distance2).all(axis=1)
+    
+    if not valid.any():
+        return -1, 0.0, 0.0, 0.0, 0.0
+    chosen = int(valid.argmax())
+    x, y, z = candidates[chosen].tolist()
+    return chosen, x, y, z, float(candidate_norm2[chosen])
+
+
+@njit(cache=True)
+def _sample_block(picks, draws, coords, coord_norm2, count, num_points, active, active_len,
+                  grid, chain, grid_offset, inv_cell, offsets, radius, radius2, min_distance, min_distance2,
+                  min_distance3, r_deep, r_floor, deep_radius2, deep_search_radius):
+    """
+    用一块预取的随机数推进采样：逐次随机选取活动点并在其周围寻找有效候选点，
+    直到这块随机数用尽、活动点耗尽或点数已满
+
+    已采样点只存于坐标数组，活动点以其序号存于整数栈，全程不构造Python对象
+
+    参数:
+        picks: 选取活动点用的均匀随机数 (B,)
+        draws: 候选点的均匀随机数 (B, 3, max_attempts)
+        coords: 已采样点坐标数组，原地追加
+        coord_norm2: 已采样点模长平方数组，原地追加
+        count: 已采样点数
+        num_points: 需要生成的点数量
+        active: 活动点序号栈，原地修改
+        active_len: 活动点数
+        grid: 网格，存放各单元格点链表首个点的序号加1，0为空，原地写入
+        chain: 单元格点链表，原地写入，见_first_valid_candidate
+        grid_offset: 网格原点坐标
+        inv_cell: 单元格边长的倒数
+        offsets: 单个候选点邻域的单元格偏移表，见_neighbor_offsets
+        radius, radius2: 球体半径及其平方
+        min_distance, min_distance2, min_distance3: 最小距离、判定用的距离平方与其立方
+        r_deep, r_floor: 采样半径上限与近边界时的下限
+        deep_radius2: 活动点距原点平方不超过此值即远离边界
+        deep_search_radius: 远离边界时覆盖全部候选点邻域的单元格半径，仅未安装numba时使用
+
+    返回:
+        tuple: (已采样点数, 活动点数)
+    """
+    grid_size = grid.shape[0]
+    for b in range(picks.shape[0]):
+        if active_len == 0 or count >= num_points:
+            break
+        # 从活动点中随机选择一个
+        idx = min(int(picks[b] * active_len), active_len - 1)
+        a = active[idx]
+        px = coords[a, 0]
+        py = coords[a, 1]
+        pz = coords[a, 2]
+        
+        # 根据剩余空间调整采样半径；活动点离边界超过2倍最小距离时无需开方，候选点也必在球体内
+        p2 = px * px + py * py + pz * pz
+        deep_inside = p2 <= deep_radius2
+        if deep_inside:
+            r_max = r_deep
+        else:
+            r_max = max(r_floor, min(r_deep, radius - math.sqrt(p2)))
+        
+        shell3 = r_max * r_max * r_max - min_distance3
+        if NUMBA_AVAILABLE:
+            chosen, x, y, z, norm2 = _first_valid_candidate(
+                px, py, pz, draws[b], min_distance3, shell3, not deep_inside, radius2,
+                grid, chain, grid_offset, inv_cell, offsets, coords, min_distance2
+            )
+        else:
+            # 逐个候选点的Python循环远慢于数组运算，改为一次检查覆盖全部候选点邻域的整块单元格；
+            # NUMBA_AVAILABLE在编译时视为常量，编译版本中此分支被裁去
+            search_radius = deep_search_radius if deep_inside else int(math.ceil((r_max + min_distance) * inv_cell))
+            chosen, x, y, z, norm2 = _first_valid_candidate_batch(
+                px, py, pz, draws[b], min_distance3, shell3, not deep_inside, radius2,
+                grid, chain, int((px - grid_offset) * inv_cell), int((py - grid_offset) * inv_cell),
+                int((pz - grid_offset) * inv_cell), search_radius, coords, coord_norm2, min_distance2
+            )
+        
+        if chosen < 0:
+            # 如果max_attempts个候选点都无效，则移除该活动点：
+            # 活动点本就随机抽取、顺序无关，用栈顶元素填补空位，O(1)
+            active_len -= 1
+            active[idx] = active[active_len]
+            continue
+        
+        # 取第一个有效的候选点
+        coords[count, 0] = x
+        coords[count, 1] = y
+        coords[count, 2] = z
+        coord_norm2[count] = norm2
+        active[active_len] = count
+        active_len += 1
+        grid_x = int((x - grid_offset) * inv_cell)
+        grid_y = int((y - grid_offset) * inv_cell)
+        grid_z = int((z - grid_offset) * inv_cell)
+        if 0 <= grid_x < grid_size and 0 <= grid_y < grid_size and 0 <= grid_z < grid_size:
+            # 新点插到所在单元格点链表的表头
+            chain[count] = grid[grid_x, grid_y, grid_z]
+            grid[grid_x, grid_y, grid_z] = count + 1
+        count += 1
+    return count, active_len
 
 
 def poisson_disk_sampling(num_points, min_distance, max_attempts=30, radius=100):
@@ -19,30 +271,30 @@ def poisson_disk_sampling(num_points, min_distance, max_attempts=30, radius=100)
     返回:
         list: 生成的点坐标列表 [(x, y, z), ...]，所有点都在球体内且满足最小距离要求
     """
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    
+    # 每个候选点只有三个坐标，用Python浮点与NumPy网格计算，不为单个点分配张量
     def is_in_sphere(point, r):
         """检查点是否在球体内"""
-        return torch.sqrt(point[0]**2 + point[1]**2 + point[2]**2) <= r
+        x, y, z = point
+        return x * x + y * y + z * z <= r * r
     
     def generate_first_point():
         """生成球体内的第一个点"""
         max_attempts = 1000
         for _ in range(max_attempts):
             # 使用球坐标生成均匀分布的点
-            theta = torch.rand(1).item() * 2 * math.pi
-            phi = torch.rand(1).item() * math.pi
+            theta = random.random() * 2 * math.pi
+            phi = random.random() * math.pi
             # 使用立方根分布确保体积均匀
-            r = radius * (torch.rand(1).item() ** (1/3))
+            r = radius * (random.random() ** (1/3))
             
             x = r * math.sin(phi) * math.cos(theta)
             y = r * math.sin(phi) * math.sin(theta)
             z = r * math.cos(phi)
             
-            point = torch.tensor([x, y, z], device=device)
+            point = (x, y, z)
             if is_in_sphere(point, radius):
                 return point
-        return torch.tensor([0.0, 0.0, 0.0], device=device)  # 回退到原点
+        return (0.0, 0.0, 0.0)  # 回退到原点
     
     # 对于少量点，使用分层采样确保均匀分布
     if num_points <= 10:
@@ -50,13 +302,13 @@ def poisson_disk_sampling(num_points, min_distance, max_attempts=30, radius=100)
         points = []
         if num_points == 1:
             # 单点放在中心附近
-            points = [torch.tensor([0.0, 0.0, 0.0], device=device)]
+            points = [(0.0, 0.0, 0.0)]
         elif num_points == 2:
             # 两点放在相对位置
             r = radius * 0.7
             points = [
-                torch.tensor([r, 0.0, 0.0], device=device),
-                torch.tensor([-r, 0.0, 0.0], device=device)
+                (r, 0.0, 0.0),
+                (-r, 0.0, 0.0)
             ]
         elif num_points <= 6:
             # 使用正多面体顶点分布
@@ -66,43 +318,43 @@ def poisson_disk_sampling(num_points, min_distance, max_attempts=30, radius=100)
                 angle = 2 * math.pi / 3
                 for i in range(3):
                     theta = i * angle
-                    points.append(torch.tensor([
+                    points.append((
                         r * math.cos(theta),
                         r * math.sin(theta),
                         0.0
-                    ], device=device))
+                    ))
             elif num_points == 4:
                 # 四面体
                 r = radius * 0.5
                 a = r * math.sqrt(8/9)
                 c = r * 1/3
                 points = [
-                    torch.tensor([0.0, 0.0, r], device=device),
-                    torch.tensor([a * math.cos(0), a * math.sin(0), -c], device=device),
-                    torch.tensor([a * math.cos(2*math.pi/3), a * math.sin(2*math.pi/3), -c], device=device),
-                    torch.tensor([a * math.cos(4*math.pi/3), a * math.sin(4*math.pi/3), -c], device=device)
+                    (0.0, 0.0, r),
+                    (a * math.cos(0), a * math.sin(0), -c),
+                    (a * math.cos(2*math.pi/3), a * math.sin(2*math.pi/3), -c),
+                    (a * math.cos(4*math.pi/3), a * math.sin(4*math.pi/3), -c)
                 ]
             elif num_points == 5:
                 # 三角双锥
                 r = radius * 0.5
                 a = r * math.sqrt(3/4)
                 points = [
-                    torch.tensor([0.0, 0.0, r], device=device),
-                    torch.tensor([0.0, 0.0, -r], device=device),
-                    torch.tensor([a, 0.0, 0.0], device=device),
-                    torch.tensor([-a/2, a * math.sqrt(3)/2, 0.0], device=device),
-                    torch.tensor([-a/2, -a * math.sqrt(3)/2, 0.0], device=device)
+                    (0.0, 0.0, r),
+                    (0.0, 0.0, -r),
+                    (a, 0.0, 0.0),
+                    (-a/2, a * math.sqrt(3)/2, 0.0),
+                    (-a/2, -a * math.sqrt(3)/2, 0.0)
                 ]
             elif num_points == 6:
                 # 八面体
                 r = radius * 0.5
                 points = [
-                    torch.tensor([r, 0.0, 0.0], device=device),
-                    torch.tensor([-r, 0.0, 0.0], device=device),
-                    torch.tensor([0.0, r, 0.0], device=device),
-                    torch.tensor([0.0, -r, 0.0], device=device),
-                    torch.tensor([0.0, 0.0, r], device=device),
-                    torch.tensor([0.0, 0.0, -r], device=device)
+                    (r, 0.0, 0.0),
+                    (-r, 0.0, 0.0),
+                    (0.0, r, 0.0),
+                    (0.0, -r, 0.0),
+                    (0.0, 0.0, r),
+                    (0.0, 0.0, -r)
                 ]
         else:
             # 少量点使用球面均匀分布
@@ -114,102 +366,70 @@ def poisson_disk_sampling(num_points, min_distance, max_attempts=30, radius=100)
                 x = r * math.cos(theta) * math.sin(phi)
                 y = r * math.sin(theta) * math.sin(phi)
                 z = r * math.cos(phi)
-                points.append(torch.tensor([x, y, z], device=device))
+                points.append((x, y, z))
         
         # 验证所有点都在球体内
         valid_points = [p for p in points if is_in_sphere(p, radius)]
         if len(valid_points) == num_points:
-            return [tuple(p.cpu().numpy()) for p in valid_points]
+            return valid_points
     
     # 对于大量点，使用标准泊松盘采样
-    points = []
-    active_list = []
-    
     # 生成第一个点
     first_point = generate_first_point()
-    points.append(first_point)
-    active_list.append(first_point)
     
-    # 定义单元格大小，用于加速邻近点搜索
+    # 定义单元格大小，用于加速邻近点搜索：边长取最小距离，每个单元格可容纳多个点，
+    # 以单元格点链表串起，候选点只需检查3×3×3个单元格
     sphere_diameter = 2 * radius
-    cell_size = min_distance / math.sqrt(3)
+    cell_size = min_distance
     grid_size = max(1, int(sphere_diameter / cell_size) + 1)
     grid_offset = -radius
     
-    # 使用PyTorch张量创建网格
-    grid = torch.full((grid_size, grid_size, grid_size), -1, dtype=torch.long, device=device)
+    # 循环不变量一次算好：距离比较一律用平方，网格下标用乘法
+    inv_cell = 1.0 / cell_size
+    radius2 = radius * radius
+    min_distance2 = (min_distance * 0.999) ** 2
+    min_distance3 = min_distance * min_distance * min_distance
+    r_deep = min_distance * 2  # 远离边界的活动点的采样半径上限
+    r_floor = min_distance * 1.2
+    deep_radius2 = (radius - r_deep) ** 2 if radius > r_deep else -1.0  # 活动点距原点平方不超过此值即远离边界
+    deep_search_radius = int(math.ceil((r_deep + min_distance) * inv_cell))
+    neighbor_offsets = _neighbor_offsets()  # 偏移表只建一次
+    
+    # 网格存放各单元格点链表首个点的序号加1，0为空；已采样点只存于预分配的坐标数组，count为已采样点数
+    # 以0表示空单元格，网格可由np.zeros分配：大块内存直接取自操作系统的零页，只有写入或读到的页才实际占用，
+    # 点相对网格稀疏时既省去G³的初始化填充，也不占满G³的内存；点数不超过int16上限时改用int16，占用再减半
+    index_dtype = np.int16 if num_points < np.iinfo(np.int16).max else np.int32
+    grid = np.zeros((grid_size, grid_size, grid_size), dtype=index_dtype)
+    coords = np.empty((max(num_points, 1), 3))
+    chain = np.zeros(len(coords), dtype=index_dtype)
+    coords[0] = first_point
+    count = 1
+    # 各点的模长平方随坐标一并存下，距离矩阵直接按序号取用，不对邻近点重复求
+    coord_norm2 = np.empty(len(coords))
+    coord_norm2[0] = np.einsum('ij,ij->i', coords[:1], coords[:1])[0]
     
-    grid_x = int((first_point[0] - grid_offset) / cell_size)
-    grid_y = int((first_point[1] - grid_offset) / cell_size)
-    grid_z = int((first_point[2] - grid_offset) / cell_size)
+    grid_x = int((first_point[0] - grid_offset) * inv_cell)
+    grid_y = int((first_point[1] - grid_offset) * inv_cell)
+    grid_z = int((first_point[2] - grid_offset) * inv_cell)
     if 0 <= grid_x < grid_size and 0 <= grid_y < grid_size and 0 <= grid_z < grid_size:
-        grid[grid_x, grid_y, grid_z] = 0
+        grid[grid_x, grid_y, grid_z] = 1
     
-    while active_list and len(points) < num_points:
-        # 从活动列表中随机选择一个点
-        idx = torch.randint(0, len(active_list), (1,)).item()
-        point = active_list[idx]
-        found = False
-        
-        # 尝试生成新点
-        for _ in range(max_attempts):
-            # 使用更智能的采样策略，确保均匀分布
-            theta = torch.rand(1).item() * 2 * math.pi
-            phi = torch.rand(1).item() * math.pi
-            
-            # 根据剩余空间调整采样半径
-            current_distance = torch.sqrt(point[0]**2 + point[1]**2 + point[2]**2).item()
-            max_possible_r = min(min_distance * 2, radius - current_distance)
-            r = torch.rand(1).item() * (max(min_distance * 1.2, max_possible_r) - min_distance) + min_distance
-            
-            x = point[0] + r * math.sin(phi) * math.cos(theta)
-            y = point[1] + r * math.sin(phi) * math.sin(theta)
-            z = point[2] + r * math.cos(phi)
-            
-            new_point = torch.tensor([x, y, z], device=device)
-            
-            # 检查是否在球体内
-            if not is_in_sphere(new_point, radius):
-                continue
-            
-            # 检查与现有点的距离
-            grid_x = int((x - grid_offset) / cell_size)
-            grid_y = int((y - grid_offset) / cell_size)
-            grid_z = int((z - grid_offset) / cell_size)
-            
-            # 检查邻近单元格
-            valid = True
-            search_radius = 2
-            for i in range(max(0, grid_x - search_radius), min(grid_size, grid_x + search_radius + 1)):
-                for j in range(max(0, grid_y - search_radius), min(grid_size, grid_y + search_radius + 1)):
-                    for k in range(max(0, grid_z - search_radius), min(grid_size, grid_z + search_radius + 1)):
-                        if 0 <= i < grid_size and 0 <= j < grid_size and 0 <= k < grid_size:
-                            if grid[i, j, k] != -1:
-                                neighbor = points[grid[i, j, k]]
-                                distance = torch.sqrt(
-                                    (new_point[0] - neighbor[0])**2 +
-                                    (new_point[1] - neighbor[1])**2 +
-                                    (new_point[2] - neighbor[2])**2
-                                ).item()
-                                if distance < min_distance * 0.999:
-                                    valid = False
-                                    break
-                    if not valid:
-                        break
-                if not valid:
-                    break
-            
-            if valid:
-                points.append(new_point)
-                active_list.append(new_point)
-                if 0 <= grid_x < grid_size and 0 <= grid_y < grid_size and 0 <= grid_z < grid_size:
-                    grid[grid_x, grid_y, grid_z] = len(points) - 1
-                found = True
-                break
-        
-        # 如果经过max_attempts次尝试仍未找到有效点，则从活动列表中移除该点
-        if not found:
-            active_list.pop(idx)
+    # 活动点以其在坐标数组中的序号存于整数栈，active_len为活动点数
+    active = np.empty(len(coords), dtype=np.int32)
+    active[0] = 0
+    active_len = 1
+    
+    # 活动点的选取与候选点所需的随机数按块预取，整块交给_sample_block推进采样；
+    # 随机数发生器的种子取自random模块，random.seed仍可复现采样结果
+    rng = np.random.default_rng(random.getrandbits(64))
+    while active_len and count < num_points:
+        picks = rng.random(_DRAW_BLOCK)
+        draws = rng.random((_DRAW_BLOCK, 3, max_attempts))
+        count, active_len = _sample_block(
+            picks, draws, coords, coord_norm2, count, num_points, active, active_len,
+            grid, chain, grid_offset, inv_cell, neighbor_offsets, radius, radius2, min_distance, min_distance2,
+            min_distance3, r_deep, r_floor, deep_radius2, deep_search_radius
+        )
     
     # 不再使用随机采样补充，只返回通过泊松盘采样生成的点
-    return [tuple(p.cpu().numpy()) for p in points]
\ No newline at end of file
+    return list(map(tuple, coords[:count].tolist()))
\ No newline at end of file
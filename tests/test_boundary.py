@@ -0,0 +1,43 @@
+import random
+import unittest
+import numpy as np
+from galaxy_system.models.vector3d import Vector3D
+from galaxy_system.models.celestial_plume import CelestialPlume
+from galaxy_system.modules.boundary.infinite import MirrorAbyssGate
+from galaxy_system.modules.boundary.reflective import PrismicEchoWall
+
+
+class RandomBoundaryTest(unittest.TestCase):
+    """随机子模式（飘散、漫反射）的可复现性"""
+    
+    def collide(self, cls, seed: int):
+        random.seed(seed)
+        boundary = cls(100.0, reflection_angle=1.0)
+        plume = CelestialPlume(Vector3D(90.0, 60.0, 30.0), Vector3D(1.0, 2.0, -3.0), 1.0)
+        self.assertTrue(boundary.check_collision(plume))
+        return boundary.handle_collision(plume, 1.0)
+    
+    def collide_batch(self, cls, seed: int):
+        random.seed(seed)
+        boundary = cls(100.0, reflection_angle=1.0)
+        positions = np.tile((90.0, 60.0, 30.0), (4, 1))
+        velocities = np.tile((1.0, 2.0, -3.0), (4, 1))
+        return boundary.handle_collision_batch(positions, velocities, 1.0)
+    
+    def test_seeded_collisions_reproduce(self):
+        """单个碰撞与批量碰撞各自在random.seed相同时结果相同，种子不同时结果不同
+        
+        两条路径的随机数来源不同（random.uniform与以random.getrandbits播种的numpy发生器），彼此不作比较
+        """
+        for cls in (MirrorAbyssGate, PrismicEchoWall):
+            with self.subTest(boundary=cls.__name__):
+                self.assertEqual(self.collide(cls, 7), self.collide(cls, 7))
+                self.assertNotEqual(self.collide(cls, 7), self.collide(cls, 8))
+                for a, b in zip(self.collide_batch(cls, 7), self.collide_batch(cls, 7)):
+                    np.testing.assert_array_equal(a, b)
+                self.assertFalse(all(np.array_equal(a, b)
+                                     for a, b in zip(self.collide_batch(cls, 7), self.collide_batch(cls, 8))))
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
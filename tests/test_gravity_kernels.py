@@ -0,0 +1,124 @@
+import unittest
+import numpy as np
+from galaxy_system.models.vector3d import Vector3D
+from galaxy_system.models.stellar_pearl import StellarPearl
+from galaxy_system.models.celestial_plume import CelestialPlume
+from galaxy_system.modules import _gravity_kernels
+from galaxy_system.modules.gravity_loom import GravityLoom
+
+
+def build_sources(n, seed=7):
+    """n个引力源，坐标散布在边长400的立方体内，最后一个质量低于1e-10，不作为扰动中的主星核"""
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-200.0, 200.0, (n, 3))
+    masses = rng.uniform(50.0, 5000.0, n)
+    masses[-1] = 1e-12
+    return positions, masses
+
+
+def python_kernel(kernel):
+    """njit内核的Python原函数；未安装numba时内核本身就是原函数"""
+    return getattr(kernel, "py_func", kernel)
+
+
+class KernelFallbackTest(unittest.TestCase):
+    """编译内核与未安装numba时的Python实现结果一致"""
+    
+    def test_mutual_acceleration_sum(self):
+        """逐对循环、Python原函数与triu_indices数组版本的Σ_i a_i一致"""
+        positions, masses = build_sources(12)
+        for relativistic in (False, True):
+            args = (positions, masses, 0.1, 1e-10, 50.0, relativistic)
+            expected = python_kernel(_gravity_kernels.mutual_acceleration_sum)(*args)
+            np.testing.assert_allclose(_gravity_kernels.mutual_acceleration_sum(*args), expected, rtol=1e-9)
+            np.testing.assert_allclose(_gravity_kernels._mutual_acceleration_sum_pairs(*args), expected, rtol=1e-9)
+    
+    def test_total_acceleration(self):
+        """编译的total_acceleration与其Python原函数一致"""
+        positions, masses = build_sources(12)
+        sx, sy, sz = _gravity_kernels._mutual_acceleration_sum_pairs(positions, masses, 0.1, 1e-10, 50.0, True)
+        args = (17.0, -11.0, 23.0, 2.5, positions, masses, sx, sy, sz, 0.1, 1e-10, 50.0, True, True, 1.0)
+        np.testing.assert_allclose(_gravity_kernels.total_acceleration(*args),
+                                   python_kernel(_gravity_kernels.total_acceleration)(*args), rtol=1e-9)
+
+
+class ClosedFormPerturbationTest(unittest.TestCase):
+    """闭式扰动项与逐个有序星核对调用calculate_perturbation_force的求和一致"""
+    
+    def reference_acceleration(self, gravity, plume, pearls):
+        """原始算法：基本引力之和，加上全部有序对(i, j)、i≠j的扰动引力，再除以星翎质量"""
+        total_force = Vector3D(0, 0, 0)
+        for source in pearls:
+            total_force += gravity.calculate_gravity_force(source, plume)
+        for i, primary in enumerate(pearls):
+            for j, perturber in enumerate(pearls):
+                if i != j:
+                    total_force += gravity.calculate_perturbation_force(primary, plume, perturber)
+        return total_force / plume.mass
+    
+    def test_matches_ordered_pair_loop(self):
+        """有无相对论修正时，acceleration_at都与逐对求和一致"""
+        positions, masses = build_sources(9)
+        pearls = [StellarPearl(f"P{i}", Vector3D(*position), mass, 1.0, 1.0, 1.0)
+                  for i, (position, mass) in enumerate(zip(positions.tolist(), masses.tolist()))]
+        plume = CelestialPlume(Vector3D(17.0, -11.0, 23.0), Vector3D(0.0, 0.0, 0.0), 2.5)
+        for relativistic in (False, True):
+            gravity = GravityLoom(gravity_constant=0.1, speed_of_light=50.0,
+                                  enable_relativistic_corrections=relativistic)
+            expected = self.reference_acceleration(gravity, plume, pearls)
+            actual = gravity.acceleration_at(plume.position, plume.mass, pearls)
+            np.testing.assert_allclose((actual.x, actual.y, actual.z), (expected.x, expected.y, expected.z),
+                                       rtol=1e-9)
+
+
+class AccelBatchTest(unittest.TestCase):
+    """accel_batch一次求出的各行加速度与逐个调用acceleration_at一致"""
+    
+    def test_rows_match_acceleration_at(self):
+        """扰动与相对论修正的四种组合下逐行一致，星翎质量不影响加速度"""
+        positions, masses = build_sources(9)
+        pearls = [StellarPearl(f"P{i}", Vector3D(*position), mass, 1.0, 1.0, 1.0)
+                  for i, (position, mass) in enumerate(zip(positions.tolist(), masses.tolist()))]
+        plume_positions = np.random.default_rng(11).uniform(-300.0, 300.0, (6, 3))
+        for perturbations in (False, True):
+            for relativistic in (False, True):
+                gravity = GravityLoom(gravity_constant=0.1, speed_of_light=50.0, enable_perturbations=perturbations,
+                                      enable_relativistic_corrections=relativistic)
+                accelerations = gravity.accel_batch(plume_positions, pearls)
+                for p, position in enumerate(plume_positions.tolist()):
+                    expected = gravity.acceleration_at(Vector3D(*position), 2.5, pearls)
+                    # |a-b|²的矩阵乘法展开有舍入误差，不要求逐位一致
+                    np.testing.assert_allclose(accelerations[p], (expected.x, expected.y, expected.z), rtol=1e-9,
+                                               err_msg=f"perturbations={perturbations}, relativistic={relativistic}")
+
+
+class IntegrateBatchTest(unittest.TestCase):
+    """integrate_batch逐行推进的结果与对每个星翎调用integrate_step一致"""
+    
+    def test_rows_match_integrate_step(self):
+        """rk4、rk2、euler与verlet下，每行的新坐标与新速度都与单独积分一致"""
+        positions, masses = build_sources(9)
+        pearls = [StellarPearl(f"P{i}", Vector3D(*position), mass, 1.0, 1.0, 1.0)
+                  for i, (position, mass) in enumerate(zip(positions.tolist(), masses.tolist()))]
+        rng = np.random.default_rng(11)
+        plume_positions = rng.uniform(-300.0, 300.0, (6, 3))
+        plume_velocities = rng.uniform(-2.0, 2.0, (6, 3))
+        plume_masses = rng.uniform(0.5, 5.0, 6)
+        for method in ("rk4", "rk2", "euler", "verlet"):
+            gravity = GravityLoom(gravity_constant=0.1, speed_of_light=50.0,
+                                  enable_relativistic_corrections=True, integration_method=method)
+            new_positions, new_velocities = gravity.integrate_batch(
+                plume_positions, plume_velocities, plume_masses, pearls, 0.5)
+            for p in range(len(plume_masses)):
+                # 新建的星翎没有加速度缓存，verlet与批量版本一样现求a_old
+                plume = CelestialPlume(Vector3D(*plume_positions[p]), Vector3D(*plume_velocities[p]),
+                                       float(plume_masses[p]))
+                position, velocity = gravity.integrate_step(plume, pearls, 0.5)
+                np.testing.assert_allclose(new_positions[p], (position.x, position.y, position.z), rtol=1e-12,
+                                           err_msg=method)
+                np.testing.assert_allclose(new_velocities[p], (velocity.x, velocity.y, velocity.z), rtol=1e-12,
+                                           err_msg=method)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
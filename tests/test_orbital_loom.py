@@ -0,0 +1,49 @@
+import logging
+import unittest
+from galaxy_system.models.vector3d import Vector3D
+from galaxy_system.models.stellar_pearl import StellarPearl
+from galaxy_system.models.celestial_plume import CelestialPlume
+from galaxy_system.modules.gravity_loom import GravityLoom
+from galaxy_system.modules.orbital_loom import OrbitalLoom
+from galaxy_system.modules.boundary.infinite import MirrorAbyssGate
+
+
+class VelocityVerletStepTest(unittest.TestCase):
+    """星轨织机在速度Verlet下的步进"""
+    
+    def setUp(self):
+        # INFO日志会额外求一次加速度，关闭后每步只剩积分本身的引力计算
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.gravity = GravityLoom(integration_method="verlet")
+        self.loom = OrbitalLoom(self.gravity, MirrorAbyssGate(5000.0), time_step=1.0)
+        self.pearls = [StellarPearl("A", Vector3D(0.0, 0.0, 0.0), 2000.0, 1.0, 1.0, 1.0),
+                       StellarPearl("B", Vector3D(800.0, 0.0, 0.0), 2000.0, 1.0, 1.0, 1.0)]
+        self.plume = CelestialPlume(Vector3D(300.0, 200.0, 0.0), Vector3D(0.0, 1.0, 0.0), 1.0)
+    
+    def test_position_follows_integrator(self):
+        """星翎停在积分器给出的位置，不再按新速度额外漂移"""
+        expected_position, expected_velocity = self.gravity.integrate_step(
+            CelestialPlume(self.plume.position, self.plume.velocity, self.plume.mass), self.pearls, 1.0)
+        self.loom.step(self.pearls, self.plume, 0)
+        self.assertEqual(self.plume.position, expected_position)
+        self.assertEqual(self.plume.velocity, expected_velocity)
+    
+    def test_acceleration_reused_between_steps(self):
+        """只有首步现求a_old，之后每步复用上一步在新位置求得的加速度"""
+        calls = []
+        acceleration_at = self.gravity.acceleration_at
+        
+        def counting_acceleration_at(*args, **kwargs):
+            calls.append(args[0])
+            return acceleration_at(*args, **kwargs)
+        
+        self.gravity.acceleration_at = counting_acceleration_at
+        for step in range(50):
+            self.loom.step(self.pearls, self.plume, step)
+            self.assertIsNotNone(self.plume.cached_acceleration())
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,37 @@
+import random
+import unittest
+import numpy as np
+from poisson_disk_sampling import poisson_disk_sampling
+
+
+class PoissonDiskSamplingTest(unittest.TestCase):
+    """泊松盘采样的点间距与球体约束"""
+    
+    def sample(self, num_points, min_distance, radius):
+        """固定种子采样，返回坐标数组 (M, 3)"""
+        random.seed(0)
+        return np.array(poisson_disk_sampling(num_points, min_distance, max_attempts=30, radius=radius))
+    
+    def test_points_keep_min_distance(self):
+        """任意两点间距不小于最小距离（采样按0.999倍最小距离判定）"""
+        for num_points, min_distance, radius in ((40, 20.0, 200.0), (800, 8.0, 100.0)):
+            points = self.sample(num_points, min_distance, radius)
+            self.assertEqual(len(points), num_points)
+            d2 = ((points[:, None, :] - points[None, :, :]) ** 2).sum(axis=-1)
+            np.fill_diagonal(d2, np.inf)
+            self.assertGreaterEqual(d2.min(), (min_distance * 0.999) ** 2)
+    
+    def test_points_inside_sphere(self):
+        """全部点都在以原点为中心的球体内，包括点数多到必须贴近边界时"""
+        for num_points, min_distance, radius in ((40, 20.0, 200.0), (3000, 5.0, 60.0)):
+            points = self.sample(num_points, min_distance, radius)
+            self.assertGreater(len(points), 0)
+            self.assertLessEqual(np.einsum('ij,ij->i', points, points).max(), radius * radius)
+    
+    def test_seed_reproduces_points(self):
+        """random.seed相同时采样结果相同"""
+        np.testing.assert_array_equal(self.sample(300, 10.0, 100.0), self.sample(300, 10.0, 100.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
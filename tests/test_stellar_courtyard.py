@@ -0,0 +1,96 @@
+import logging
+import unittest
+import numpy as np
+from galaxy_system.stellar_courtyard import StellarCourtyard
+from galaxy_system.models.vector3d import Vector3D
+from galaxy_system.modules.barnes_hut import BarnesHutTree
+from galaxy_system.modules.gravity_loom import GravityLoom
+
+
+def build_courtyard(barnes_hut_theta: float, max_sources: int) -> StellarCourtyard:
+    """在4×4×3的网格上放置48颗星核，星翎从网格中部出发"""
+    courtyard = StellarCourtyard()
+    courtyard.set_constants(gravity_force_min_distance=1e-10, barnes_hut_theta=barnes_hut_theta,
+                            max_sources=max_sources)
+    courtyard.build_galaxy(central_mass=885000, boundary_type="infinite")
+    for i, (x, y, z) in enumerate(np.ndindex(4, 4, 3)):
+        courtyard.add_stellar_pearl(name=f"P{i}", mass=2000,
+                                    position=Vector3D(60.0 * x - 90.0, 60.0 * y - 90.0, 60.0 * z - 60.0))
+    courtyard.set_celestial_plume(mass=1.0, position=Vector3D(17.0, -11.0, 23.0), velocity=Vector3D(0.5, -0.3, 0.2))
+    courtyard.set_time_step(1)
+    return courtyard
+
+
+class BarnesHutSimulationTest(unittest.TestCase):
+    """经星枢庭园配置的八叉树路径"""
+    
+    def setUp(self):
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+    
+    def test_max_sources_reaches_octree(self):
+        """引力源上限不少于BARNES_HUT_MIN_SOURCES时，张角阈值>0的步进经八叉树计算，结果接近两两精确求和"""
+        max_sources = GravityLoom.BARNES_HUT_MIN_SOURCES * 2
+        approx = build_courtyard(0.5, max_sources)
+        exact = build_courtyard(0.0, max_sources)
+        self.assertEqual(approx.simulation_module.max_sources, max_sources)
+        self.assertFalse(approx.simulation_module._can_fuse_step())
+        # 星核密集、扰动项随引力源数放大，轨迹很快发散，只比较单步结果
+        approx_history = approx.run_simulation(1)
+        exact_history = exact.run_simulation(1)
+        
+        self.assertIsInstance(approx.simulation_module._last_filtered[2], BarnesHutTree)
+        self.assertIsNone(exact.simulation_module._last_filtered[2])
+        self.assertFalse(np.array_equal(approx_history.velocities, exact_history.velocities))
+        np.testing.assert_allclose(approx_history.velocities, exact_history.velocities, rtol=1e-2)
+        np.testing.assert_allclose(approx_history.positions, exact_history.positions, rtol=1e-2)
+
+class SleepTimerTest(unittest.TestCase):
+    """星核沉眠计时器"""
+    
+    def test_timers_follow_swap_remove(self):
+        """沉眠星核在60步后复苏，计时器随星核的交换移除一并搬移"""
+        courtyard = build_courtyard(0.0, GravityLoom.BARNES_HUT_MIN_SOURCES)
+        soa = courtyard.galaxy_model.pearl_soa
+        first, last = courtyard.galaxy_model.get_stellar_pearls()[0], courtyard.galaxy_model.get_stellar_pearls()[-1]
+        courtyard._handle_capture_events({"captures": [{"stellar_pearl_id": id(last)}]})
+        self.assertFalse(last.perturbations)
+        
+        courtyard.remove_stellar_pearl(first)  # 末位的沉眠星核搬入第0行
+        self.assertEqual(last.soa_index, 0)
+        self.assertEqual(soa.sleep_timers[0], 60)
+        self.assertEqual(courtyard.get_galaxy_status()["disabled_gravity_count"], 1)
+        
+        for _ in range(60):
+            courtyard._update_gravity_timers()
+        self.assertFalse(last.perturbations)
+        courtyard._update_gravity_timers()
+        self.assertTrue(last.perturbations)
+        self.assertTrue((soa.sleep_timers == -1).all())
+        self.assertEqual(courtyard.get_galaxy_status()["disabled_gravity_count"], 0)
+
+class SnapshotTest(unittest.TestCase):
+    """星穹领域的整体快照"""
+    
+    def test_snapshot_matches_to_dict(self):
+        """交换移除后，快照的各列仍与逐个星核的to_dict一致"""
+        courtyard = build_courtyard(0.0, GravityLoom.BARNES_HUT_MIN_SOURCES)
+        canopy = courtyard.galaxy_model
+        pearls = canopy.get_stellar_pearls()
+        pearls[-1].perturbations = False
+        courtyard.remove_stellar_pearl(pearls[0])  # 末位星核搬入第0行
+        courtyard.remove_stellar_pearl(pearls[5])
+        
+        expected = [pearl.to_dict() for pearl in canopy.get_stellar_pearls()]
+        self.assertEqual(canopy.snapshot(), {
+            "names": [d["name"] for d in expected],
+            "positions": [list(d["position"]) for d in expected],
+            "masses": [d["mass"] for d in expected],
+            "valid": [d["is_valid"] for d in expected],
+            "perturbations": [d["perturbations"] for d in expected]
+        })
+        self.assertFalse(canopy.snapshot()["perturbations"][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file